@@ -1,45 +1,45 @@
-import csv
 import os
-import requests
-from datetime import datetime, timedelta
-
-def traffic_data(api_key, origin, destination, start_time, end_time, interval):
-    current_time = start_time
-    data_rows = []
-
-    while current_time <= end_time:
-        timestamp = int(current_time.timestamp())
-        url = (
-            "https://maps.googleapis.com/maps/api/directions/json"
-            f"?origin={origin}&destination={destination}&departure_time={timestamp}&key={api_key}"
-        )
-        
-        response = requests.get(url)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            if data['status'] == 'OK':
-                leg = data['routes'][0]['legs'][0]
-                duration_in_traffic = leg.get('duration_in_traffic', {}).get('text', 'NOT FOUND')
-                print(f"Travel time at {current_time}: {duration_in_traffic}")
-                data_rows.append([current_time.strftime("%Y-%m-%d %H:%M:%S"), duration_in_traffic])
-            else:
-                print(f"Error in response: {data['status']}. Details: {data.get('error_message', 'No additional details')}")
-        else:
-            print(f"Request failed with status code: {response.status_code}")
-        
-        current_time += timedelta(minutes=interval)
-    
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.travel_collector import TravelTimeCollector, daily_jobs, write_rows
+
+
+def timeseries_path(origin, destination, start_time):
     filename = f"{origin[:3]}-{destination[:3]}_{start_time.strftime('%dth%b')}.csv"
-    filepath = os.path.join('FCT_project', 'data', 'timeseries', filename)
-    
-    # Ensure the directory exists
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    
-    with open(filepath, 'w', newline='') as csvfile:
-        csvwriter = csv.writer(csvfile)
-        csvwriter.writerow(['Date and Time', 'Travel Time'])
-        csvwriter.writerows(data_rows)
-    
-    print(f"Data saved to {filepath}")
\ No newline at end of file
+    return os.path.join('FCT_project', 'data', 'timeseries', filename)
+
+
+def traffic_data(api_key, origin, destination, start_time, end_time, interval,
+                 requests_per_second=10, max_workers=8):
+    """
+    Travel time every `interval` minutes from start_time to end_time, saved to
+    FCT_project/data/timeseries. The departure slots are fetched concurrently
+    (see common/travel_collector.py), at most requests_per_second at a time.
+    """
+    with TravelTimeCollector(api_key, requests_per_second, max_workers) as collector:
+        result = collector.collect([(origin, destination, start_time, end_time, interval)])[0]
+
+    filepath = timeseries_path(origin, destination, start_time)
+    write_rows(filepath, result['rows'])
+    print(f"Data saved to {filepath}")
+
+
+def backfill(api_key, routes, first_day, last_day, interval=10, requests_per_second=10, max_workers=8):
+    """
+    Whole days (midnight to midnight) for several routes and days in one go, one file per route
+    and day. routes is a list of (origin, destination). Returns the failed slots per file.
+    """
+    jobs = daily_jobs(routes, first_day, last_day, interval)
+    with TravelTimeCollector(api_key, requests_per_second, max_workers) as collector:
+        results = collector.collect(jobs)
+
+    failures = {}
+    for (origin, destination, start_time, _, _), result in zip(jobs, results):
+        filepath = timeseries_path(origin, destination, start_time)
+        write_rows(filepath, result['rows'])
+        if result['errors']:
+            failures[filepath] = result['errors']
+    print(f"Saved {len(jobs)} files, {sum(len(e) for e in failures.values())} slots failed")
+    return failures
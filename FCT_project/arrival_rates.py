@@ -0,0 +1,36 @@
+"""
+Arrival rate models for the FCT traffic queue (t in minutes from midnight, vehicles per minute).
+
+Shared by guassian_curve.py and model.ipynb so the peak definitions live in one place.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.intensity import GaussianPeakIntensity
+
+BASE_RATE = 40  # background traffic flow (cars per minute)
+
+# typical day, fitted to the GMM components
+ORIGINAL_PEAKS = [
+    {"amplitude": 90, "time": 420, "width": 90},   # 7 AM
+    {"amplitude": 30, "time": 660, "width": 120},  # 11 AM
+    {"amplitude": 80, "time": 900, "width": 120},  # 3 PM
+]
+
+# staggered school start times policy
+STAGGERED_PEAKS = [
+    {"amplitude": 45, "time": 300, "width": 90},   # 5 AM
+    {"amplitude": 45, "time": 480, "width": 90},   # 8 AM
+    {"amplitude": 30, "time": 660, "width": 120},  # 11 AM
+    {"amplitude": 35, "time": 780, "width": 120},  # 1 PM
+    {"amplitude": 45, "time": 960, "width": 120},  # 4 PM
+]
+
+original_arrival_rate = GaussianPeakIntensity(BASE_RATE, ORIGINAL_PEAKS)
+staggered_arrival_rate = GaussianPeakIntensity(BASE_RATE, STAGGERED_PEAKS)
+
+
+def service_rate(t):
+    return 150  # cars per minute
@@ -0,0 +1,63 @@
+"""
+Screen the arrival-rate policies with the deterministic approximations in common/fluid.py instead
+of Monte Carlo, and report how far they are from the simulated typical-day curves.
+
+The simulated curves come from scenario_sweep.py (cached, so after the first run this script only
+pays for the approximations, which take milliseconds).
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.fluid import approximate_queue, error_report
+from common.intensity import GaussianPeakIntensity
+from scenario_sweep import make_scenarios, run_sweep
+
+METHODS = ('fluid', 'psa', 'combined')
+
+
+def screen(scenarios, methods=METHODS):
+    """
+    Approximate mean queue curve of every scenario, returns {(policy, service_rate, capacity): {method: (curve, seconds)}}
+    """
+    curves = {}
+    for scenario in scenarios:
+        t = np.arange(0, scenario['T_end'] + 1)
+        arrival_rate = GaussianPeakIntensity(scenario['base_rate'], scenario['peaks'])
+        mu = scenario['service_rate']
+        key = (scenario['policy'], mu, scenario['max_queue_length'])
+        curves[key] = {}
+        for method in methods:
+            start = time.perf_counter()
+            curve = approximate_queue(arrival_rate, lambda t: mu, t, method=method,
+                                      capacity=scenario['max_queue_length'])
+            curves[key][method] = (curve, time.perf_counter() - start)
+    return curves
+
+
+def compare_with_simulation(scenarios, seed=2024, workers=None):
+    """Error report of every approximation against the simulated mean curve of its scenario"""
+    curves = screen(scenarios)
+    rows = []
+    for scenario, summary in run_sweep(scenarios, seed=seed, workers=workers):
+        key = (scenario['policy'], scenario['service_rate'], scenario['max_queue_length'])
+        for method, (curve, seconds) in curves[key].items():
+            report = error_report(curve, summary['mean_queue'], summary['time'], summary['std_queue'])
+            rows.append((key, method, seconds, report))
+    return rows
+
+
+if __name__ == "__main__":
+    scenarios = make_scenarios(service_rates=(140, 150, 160))
+    rows = compare_with_simulation(scenarios)
+
+    print(f"{'policy':<10} {'mu':>4} {'method':>9} {'ms':>7} {'MAE':>7} {'max err':>8} {'at':>6} "
+          f"{'mean err':>9} {'peak sim':>9} {'peak apx':>9} {'in 1 sd':>8}")
+    for (policy, mu, _), method, seconds, r in rows:
+        print(f"{policy:<10} {mu:>4} {method:>9} {seconds * 1e3:>7.2f} {r['mae']:>7.2f} "
+              f"{r['max_error']:>8.2f} {r['max_error_time']:>6.0f} {r['relative_error_of_mean']:>9.1%} "
+              f"{r['peak_simulated']:>9.2f} {r['peak_approximation']:>9.2f} {r['within_one_std']:>8.0%}")
@@ -1,40 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
-
-def original_arrival_rate(t, base_rate=40):
-    peaks = [
-        {"amplitude": 90, "time": 420, "width": 90},  # 7 AM
-        {"amplitude": 30, "time": 660, "width": 120},  # 11 AM
-        {"amplitude": 80, "time": 900, "width": 120},  # 3 PM
-    ]
-    
-    rate = base_rate
-    for peak in peaks:
-        A = peak["amplitude"]
-        t_peak = peak["time"]
-        sigma = peak["width"]
-        rate += A * np.exp(-((t - t_peak)**2) / (2 * sigma**2))
-    
-    return max(rate, base_rate)
-
-def staggered_arrival_rate(t, base_rate=40):
-    peaks = [
-        {"amplitude": 45, "time": 300, "width": 90},   # 5 AM
-        {"amplitude": 45, "time": 480, "width": 90},   # 8 AM
-        {"amplitude": 30, "time": 660, "width": 120},  # 11 AM
-        {"amplitude": 35, "time": 780, "width": 120},  # 1 PM
-        {"amplitude": 45, "time": 960, "width": 120},  # 4 PM
-    ]
-    
-    rate = base_rate
-    for peak in peaks:
-        A = peak["amplitude"]
-        t_peak = peak["time"]
-        sigma = peak["width"]
-        rate += A * np.exp(-((t - t_peak)**2) / (2 * sigma**2))
-    
-    return max(rate, base_rate)
+from arrival_rates import original_arrival_rate, staggered_arrival_rate
 
 def load_real_data():
     typical_day = pd.read_csv('FCT_project/data/timeseries/typical_day.csv')
@@ -49,9 +16,9 @@ def load_real_data():
 # Create time points
 time_points = np.arange(0, 1441)
 
-# Calculate arrival rates
-original_rates = [original_arrival_rate(t) for t in time_points]
-staggered_rates = [staggered_arrival_rate(t) for t in time_points]
+# Calculate arrival rates (evaluated on the whole grid at once)
+original_rates = original_arrival_rate(time_points)
+staggered_rates = staggered_arrival_rate(time_points)
 
 # Load real data
 times_real, real_data = load_real_data()
@@ -1,17 +1,21 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
-from glob import glob
 
-def get_day_metrics(file_path):
-    """Get key metrics for one day's data."""
-    df = pd.read_csv(file_path)
-    times = df['Travel Minutes']
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.travel_store import load_store
+
+def get_day_metrics(date, times):
+    """Get key metrics for one day's data (times: that day's travel minutes, one per slot)."""
+    times = pd.Series(times, dtype=float).dropna()
     mean = times.mean()
     
     return {
-        'Date': df['Date and Time'].iloc[0].split()[0],
+        'Date': str(date),
         'Mean (min)': round(mean, 1),
-        'Min (min)': times.min(),
-        'Max (min)': times.max(),
+        'Min (min)': int(times.min()),
+        'Max (min)': int(times.max()),
         'Low Threshold': round(times.quantile(0.6), 1),
         'High Threshold': round(times.quantile(0.9), 1),
         'Total Lost Minutes': round(times[times > mean].sum() - (mean * (times > mean).sum()), 1)
@@ -23,9 +27,9 @@ def get_day_metrics(file_path):
 
 
 def main():
-    # Get metrics for all files
-    files = glob('./FCT_project/data/timeseries/25Oct-to-Nov/*.csv')
-    all_metrics = [get_day_metrics(f) for f in files]
+    # Get metrics for all days, straight from the columnar store (no csv parsing after the first run)
+    store = load_store('./FCT_project/data/timeseries/25Oct-to-Nov')
+    all_metrics = [get_day_metrics(date, times) for date, times in zip(store.dates, store.minutes)]
     
     # Create and save dataframe
     df = pd.DataFrame(all_metrics)
@@ -36,4 +40,4 @@ def main():
     print("Metrics saved!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,352 @@
+"""
+Non-stationary M/M/1 queue used by model.ipynb (moved here from the notebook so it can be imported).
+
+The waiting customers are kept in a FIFO deque of arrival times, so a departure is O(1) instead of
+scanning every waiting customer with min(). Histories are stored in compact typed arrays.
+Run this file to benchmark the two FIFO implementations.
+"""
+
+from array import array
+from collections import deque
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.lindley import lindley_queue, number_in_system
+
+
+class GridStatistics:
+    def __init__(self, grid):
+        """
+        Queue statistics on a fixed time grid, collected while the simulation runs (O(grid) memory).
+
+        Parameters:
+        - grid: increasing times, e.g. np.arange(0, 1441) for every minute of the day
+
+        After the run:
+        - queue_length[k]: queue length at grid[k] (last value, like interp1d(kind='previous'))
+        - mean_queue_length[k]: time-weighted mean queue length over [grid[k], grid[k+1])
+        """
+        self.grid = np.asarray(grid, dtype=float)
+        self.queue_length = np.zeros(len(self.grid))
+        self._area = np.zeros(max(len(self.grid) - 1, 0))
+        self._next_point = 0  # first grid point not sampled yet
+        self._bin = 0         # bin the last interval ended in
+        self._last_time = -np.inf
+
+    def advance(self, t_start, t_end, queue_length):
+        """Record that the queue held queue_length on [t_start, t_end)"""
+        grid = self.grid
+        self._last_time = t_end
+        while self._next_point < len(grid) and grid[self._next_point] < t_end:
+            self.queue_length[self._next_point] = queue_length
+            self._next_point += 1
+
+        t = max(t_start, grid[0])
+        while self._bin < len(self._area) and t < t_end:
+            right = min(grid[self._bin + 1], t_end)
+            self._area[self._bin] += queue_length * (right - t)
+            if right < grid[self._bin + 1]:
+                break
+            self._bin += 1
+            t = right
+
+    def set_step_function(self, times, lengths):
+        """Fill in the grid from a whole step function at once (lengths[i] holds from times[i] on)"""
+        area = np.concatenate([[0.0], np.cumsum(lengths[:-1] * np.diff(times))])  # integral up to each time
+        k = np.maximum(np.searchsorted(times, self.grid, side='right') - 1, 0)
+        area_at_grid = area[k] + lengths[k] * (self.grid - times[k])
+        self.queue_length = lengths[k].astype(float)
+        self._area = np.diff(area_at_grid)
+        self._next_point, self._bin, self._last_time = len(self.grid), len(self._area), times[-1]
+
+    def finish(self, queue_length):
+        """Hold the final queue length until the end of the grid (the run may stop early)"""
+        self.advance(self._last_time, np.inf, queue_length)
+
+    @property
+    def mean_queue_length(self):
+        return self._area / np.diff(self.grid)
+
+    @property
+    def overall_mean_queue_length(self):
+        """Time-weighted mean over the whole grid"""
+        return np.sum(self._area) / (self.grid[-1] - self.grid[0])
+
+    def as_dict(self):
+        return {'time': self.grid, 'queue_length': self.queue_length.copy(),
+                'mean_queue_length': self.mean_queue_length}
+
+
+def time_weighted_mean_queue_length(grid_stats, times, lengths, end_time):
+    """
+    Time-weighted mean queue length of a run, the same statistic whether or not the per-event
+    history was kept: over the grid when there is one, otherwise over [times[0], end_time] from the
+    history (lengths[i] holds from times[i] to the next event).
+    """
+    if grid_stats is not None:
+        return grid_stats.overall_mean_queue_length
+    if len(times) == 0 or end_time <= times[0]:
+        return np.nan
+    durations = np.diff(np.append(times, end_time))
+    return np.sum(lengths * durations) / (end_time - times[0])
+
+
+class NonStationaryMM1:
+    def __init__(self, arrival_rate_func, service_rate_func, T_end,
+                 initial_queue_length=0, max_queue_length=None,
+                 time_step=0.1, collect_waiting_times=True, max_departures=115000,
+                 fifo='deque', rng=None, grid=None, record_history=True):
+        """
+         Non-stationary M/M/1 queue simulation
+
+        Parameters:
+        arrival_rate_func (callable): Function λ(t) returning arrival rate at time t
+        service_rate_func (callable): Function μ(t) returning service rate at time t
+        T_end (float): End time for simulation
+        initial_queue_length (int): Starting number of vehicles in queue
+        max_queue_length (int): Maximum allowed queue length (None for unlimited)
+        time_step (float): Time resolution for statistics collection, the default grid is every time_step up to T_end
+        collect_waiting_times (bool): Whether to collect individual waiting times
+        max_departures (int): Maximum number of departures before stopping
+        fifo (str): 'deque' (O(1) per departure) or 'dict' (the original dict + min() bookkeeping, for comparison)
+        rng: numpy Generator, or a seed to build one (optional)
+        grid (array): Times to collect statistics at while running (see GridStatistics), overrides time_step
+        record_history (bool): Whether to keep the per-event queue_length_history / time_history
+        """
+        if fifo not in ('deque', 'dict'):
+            raise ValueError(f"unknown fifo: {fifo}")
+        self.lambda_t = arrival_rate_func
+        self.mu_t = service_rate_func
+        self.T_end = T_end
+        self.max_queue_length = max_queue_length
+        self.time_step = time_step
+        self.max_departures = max_departures
+        self.fifo = fifo
+        self.rng = np.random.default_rng(rng)
+
+        # State variables
+        self.current_time = 0.0
+        self.queue_length = initial_queue_length
+        self.next_arrival_time = self.generate_next_arrival_time(0)
+        self.next_departure_time = float('inf')
+
+        # Enhanced statistics
+        if grid is None and np.isfinite(T_end):
+            grid = np.arange(0, T_end + time_step, time_step)
+        self.grid_stats = None if grid is None else GridStatistics(grid)
+        self.record_history = record_history
+        self.max_observed_queue_length = initial_queue_length
+        self._queue_length_history = array('q')
+        self._time_history = array('d')
+        self._waiting_times = array('d') if collect_waiting_times else None
+        if fifo == 'deque':
+            self.arrival_times = deque()  # arrival times of waiting customers, oldest first
+        else:
+            self.arrival_times = {}  # Dictionary to track arrival times of each customer
+        self.customer_id = 0     # Unique ID for each customer
+
+        # Performance metrics
+        self.total_arrivals = 0
+        self.total_departures = 0
+        self.total_waiting_time = 0
+        self.rejected_arrivals = 0  # Count of arrivals rejected due to max queue length
+
+    # the histories are returned as numpy copies, so the simulation can keep appending afterwards
+    @property
+    def queue_length_history(self):
+        return np.frombuffer(self._queue_length_history, dtype=np.int64).copy()
+
+    @property
+    def time_history(self):
+        return np.frombuffer(self._time_history, dtype=np.float64).copy()
+
+    @property
+    def waiting_times(self):
+        if self._waiting_times is None:
+            return None
+        return np.frombuffer(self._waiting_times, dtype=np.float64).copy()
+
+    def generate_next_arrival_time(self, current_time):
+        """
+        Generate time until next arrival using non-homogeneous Poisson process
+        """
+        U = self.rng.random()
+        dt = -np.log(U) / self.lambda_t(current_time)
+        return current_time + dt
+
+    def generate_service_time(self, current_time):
+        """
+        Generate service time using current service rate
+        """
+        U = self.rng.random()
+        return -np.log(U) / self.mu_t(current_time)
+
+    def step(self):
+        """
+        Enhanced step function with more statistics collection
+        """
+        # Record current state
+        if self.record_history:
+            self._queue_length_history.append(self.queue_length)
+            self._time_history.append(self.current_time)
+        if self.grid_stats is not None:
+            self.grid_stats.advance(self.current_time, min(self.next_arrival_time, self.next_departure_time), self.queue_length)
+
+        # Determine next event type
+        if self.next_arrival_time <= self.next_departure_time:
+            # Handle arrival
+            self.current_time = self.next_arrival_time
+
+            # Check max queue length
+            if self.max_queue_length is None or self.queue_length < self.max_queue_length:
+                self.queue_length += 1
+                self.total_arrivals += 1
+                self.max_observed_queue_length = max(self.max_observed_queue_length, self.queue_length)
+
+                # Track arrival time (only needed for the waiting times, which pop it again)
+                self.customer_id += 1
+                if self._waiting_times is not None:
+                    if self.fifo == 'deque':
+                        self.arrival_times.append(self.current_time)
+                    else:
+                        self.arrival_times[self.customer_id] = self.current_time
+
+                # If this is the only customer, schedule their departure
+                if self.queue_length == 1:
+                    service_time = self.generate_service_time(self.current_time)
+                    self.next_departure_time = self.current_time + service_time
+            else:
+                self.rejected_arrivals += 1
+
+            self.next_arrival_time = self.generate_next_arrival_time(self.current_time)
+
+        else:
+            # Handle departure
+            self.current_time = self.next_departure_time
+            self.queue_length -= 1
+            self.total_departures += 1
+
+            # Calculate waiting time for departing customer
+            if self._waiting_times is not None:
+                if self.fifo == 'deque':
+                    arrived = self.arrival_times.popleft()
+                else:
+                    departed_customer = min(self.arrival_times.keys())
+                    arrived = self.arrival_times.pop(departed_customer)
+                waiting_time = self.current_time - arrived
+                self._waiting_times.append(waiting_time)
+                self.total_waiting_time += waiting_time
+
+            # Schedule next departure if queue is not empty
+            if self.queue_length > 0:
+                service_time = self.generate_service_time(self.current_time)
+                self.next_departure_time = self.current_time + service_time
+            else:
+                self.next_departure_time = float('inf')
+
+
+    def run_simulation(self):
+        """
+        Run simulation until T_end or max_departures is reached
+        """
+        while self.current_time < self.T_end and self.total_departures < self.max_departures:
+            self.step()
+        if self.grid_stats is not None:
+            self.grid_stats.finish(self.queue_length)
+
+    @property
+    def grid_statistics(self):
+        """Statistics collected on the grid (dict of time, queue_length, mean_queue_length)"""
+        return None if self.grid_stats is None else self.grid_stats.as_dict()
+
+    def run_batch(self):
+        """
+        Solve the whole run at once instead of event by event: all arrivals up to T_end are drawn by
+        thinning (lambda_t must accept numpy arrays, e.g. a GaussianPeakIntensity), then departures
+        come from the Lindley recursion (common/lindley.py). Service requirements use mu_t at the
+        arrival time, which is exact when the service rate is constant (as in the FCT model).
+        Ignores max_departures.
+        """
+        grid = np.linspace(0, self.T_end, 10001)
+        bound = 1.1 * np.max(self.lambda_t(grid))  # small buffer, as in the portfolio IX thinning
+        candidates = np.sort(self.rng.uniform(0, self.T_end, self.rng.poisson(bound * self.T_end)))
+        accept = self.rng.random(len(candidates)) * bound <= self.lambda_t(candidates)
+        arrivals = np.concatenate([np.zeros(self.queue_length), candidates[accept]])
+        service_times = self.rng.exponential(1 / np.broadcast_to(self.mu_t(arrivals), arrivals.shape))
+        solution = lindley_queue(arrivals, service_times, self.max_queue_length)
+
+        admitted = solution['admitted']
+        departures = solution['departures'][admitted]
+        event_times = np.sort(np.concatenate([arrivals[admitted], departures[departures < self.T_end]]))
+        times = np.concatenate([[0.0], event_times])
+        lengths = np.concatenate([[self.queue_length], number_in_system(arrivals[admitted], departures, event_times)])
+        if self.record_history:
+            self._time_history = array('d', times)
+            self._queue_length_history = array('q', lengths)
+        if self.grid_stats is not None:
+            self.grid_stats.set_step_function(times, lengths)
+        self.max_observed_queue_length = int(lengths.max())
+        if self._waiting_times is not None:
+            done = departures < self.T_end
+            self._waiting_times = array('d', departures[done] - arrivals[admitted][done])
+            self.total_waiting_time = float(np.sum(self._waiting_times))
+
+        self.total_arrivals = int(admitted.sum()) - self.queue_length
+        self.rejected_arrivals = int((~admitted).sum())
+        self.total_departures = int(np.sum(departures < self.T_end))
+        self.queue_length = int(lengths[-1])
+        self.current_time = self.T_end
+
+    def get_statistics(self):
+        """
+        Return summary statistics of the simulation
+        """
+        stats = {
+            'average_queue_length': time_weighted_mean_queue_length(
+                self.grid_stats, self.time_history, self.queue_length_history, self.current_time),
+            'max_queue_length': self.max_observed_queue_length,
+            'total_arrivals': self.total_arrivals,
+            'total_departures': self.total_departures,
+            'rejected_arrivals': self.rejected_arrivals
+        }
+
+        if self._waiting_times:
+            stats.update({
+                'average_waiting_time': np.mean(self.waiting_times),
+                'max_waiting_time': np.max(self.waiting_times),
+                'min_waiting_time': np.min(self.waiting_times)
+            })
+
+        return stats
+
+
+def benchmark_fifo(queue_sizes=(1000, 5000, 20000, 50000), events=3000):
+    """
+    Time per event for both FIFO implementations once the queue holds a given number of customers.
+    The queue is filled with arrivals only (service rate ~0), then `events` departures/arrivals
+    are timed with a 2:1 service to arrival ratio.
+    """
+    results = {}
+    for fifo in ('deque', 'dict'):
+        for size in queue_sizes:
+            sim = NonStationaryMM1(lambda t: 1.0, lambda t: 1e-12, T_end=np.inf, fifo=fifo, rng=0)
+            while sim.queue_length < size:
+                sim.step()
+            sim.mu_t = lambda t: 2.0
+            sim.next_departure_time = sim.current_time + sim.generate_service_time(sim.current_time)
+            start = time.perf_counter()
+            for _ in range(events):
+                sim.step()
+            results[(fifo, size)] = (time.perf_counter() - start) / events
+    return results
+
+
+if __name__ == "__main__":
+    results = benchmark_fifo()
+    print(f"{'queue size':>10} {'deque (us/event)':>18} {'dict (us/event)':>18}")
+    for size in sorted({size for _, size in results}):
+        print(f"{size:>10} {results[('deque', size)] * 1e6:>18.2f} {results[('dict', size)] * 1e6:>18.2f}")
@@ -0,0 +1,170 @@
+"""
+Non-stationary M/M/c version of NonStationaryMM1, e.g. several road lanes served in parallel.
+
+Same arrival model, statistics and output as NonStationaryMM1, but the events go through the heap
+event calendar in common/event_calendar.py, so any number of servers can be busy at once.
+Run this file to measure the event throughput for a range of server counts.
+"""
+
+from array import array
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.multiserver import MultiServerQueue
+from nonstationary_mm1 import GridStatistics, time_weighted_mean_queue_length
+
+
+class NonStationaryMMc:
+    def __init__(self, arrival_rate_func, service_rate_func, T_end, servers=1,
+                 initial_queue_length=0, max_queue_length=None,
+                 time_step=0.1, collect_waiting_times=True, max_departures=115000,
+                 rng=None, grid=None, record_history=True):
+        """
+        Non-stationary M/M/c queue simulation
+
+        Parameters:
+        arrival_rate_func (callable): Function λ(t) returning arrival rate at time t
+        service_rate_func (callable): Function μ(t) returning the service rate of each server at time t
+        T_end (float): End time for simulation
+        servers (int): Number of servers (lanes) c
+        initial_queue_length (int): Starting number of vehicles in the system
+        max_queue_length (int): Maximum allowed number in the system (None for unlimited)
+        time_step (float): Time resolution for statistics collection, the default grid is every time_step up to T_end
+        collect_waiting_times (bool): Whether to collect individual waiting times (time in system, as in NonStationaryMM1)
+        max_departures (int): Maximum number of departures before stopping
+        rng: numpy Generator, or a seed to build one (optional)
+        grid (array): Times to collect statistics at while running (see GridStatistics), overrides time_step
+        record_history (bool): Whether to keep the per-event queue_length_history / time_history
+        """
+        self.lambda_t = arrival_rate_func
+        self.mu_t = service_rate_func
+        self.T_end = T_end
+        self.servers = servers
+        self.max_queue_length = max_queue_length
+        self.max_departures = max_departures
+        self.rng = np.random.default_rng(rng)
+
+        if grid is None and np.isfinite(T_end):
+            grid = np.arange(0, T_end + time_step, time_step)
+        self.grid_stats = None if grid is None else GridStatistics(grid)
+        self.record_history = record_history
+        self._queue_length_history = array('q')
+        self._time_history = array('d')
+
+        self.queue = MultiServerQueue(self.generate_next_arrival_time, self.generate_service_time,
+                                      servers=servers, capacity=max_queue_length,
+                                      initial_number=initial_queue_length,
+                                      collect_waiting_times=collect_waiting_times,
+                                      max_departures=max_departures)
+
+    def generate_next_arrival_time(self, current_time):
+        """Time of the next arrival, rate taken at the current time (as in NonStationaryMM1)"""
+        return current_time + self.rng.exponential(1 / self.lambda_t(current_time))
+
+    def generate_service_time(self, current_time):
+        return self.rng.exponential(1 / self.mu_t(current_time))
+
+    def _record(self, t):
+        # the system held number_in_system from the previous event up to t
+        n = self.queue.number_in_system
+        if self.record_history:
+            self._queue_length_history.append(n)
+            self._time_history.append(self.queue.now)
+        if self.grid_stats is not None:
+            self.grid_stats.advance(self.queue.now, t, n)
+
+    def run_simulation(self):
+        """Run simulation until T_end or max_departures is reached"""
+        self.queue.run(until=self.T_end, before_event=self._record)
+        if self.grid_stats is not None:
+            self.grid_stats.finish(self.queue.number_in_system)
+
+    # same names as NonStationaryMM1
+    @property
+    def current_time(self):
+        return self.queue.now
+
+    @property
+    def queue_length(self):
+        return self.queue.number_in_system
+
+    @property
+    def total_arrivals(self):
+        return self.queue.arrivals
+
+    @property
+    def total_departures(self):
+        return self.queue.departures
+
+    @property
+    def rejected_arrivals(self):
+        return self.queue.rejected
+
+    @property
+    def queue_length_history(self):
+        return np.frombuffer(self._queue_length_history, dtype=np.int64).copy()
+
+    @property
+    def time_history(self):
+        return np.frombuffer(self._time_history, dtype=np.float64).copy()
+
+    @property
+    def waiting_times(self):
+        if self.queue.sojourn_times is None:
+            return None
+        return np.frombuffer(self.queue.sojourn_times, dtype=np.float64).copy()
+
+    @property
+    def grid_statistics(self):
+        """Statistics collected on the grid (dict of time, queue_length, mean_queue_length)"""
+        return None if self.grid_stats is None else self.grid_stats.as_dict()
+
+    def get_statistics(self):
+        """
+        Return summary statistics of the simulation
+        """
+        stats = {
+            'average_queue_length': time_weighted_mean_queue_length(
+                self.grid_stats, self.time_history, self.queue_length_history, self.current_time),
+            'max_queue_length': self.queue.max_number_in_system,
+            'total_arrivals': self.total_arrivals,
+            'total_departures': self.total_departures,
+            'rejected_arrivals': self.rejected_arrivals
+        }
+
+        if self.queue.sojourn_times:
+            waiting_times = self.waiting_times
+            stats.update({
+                'average_waiting_time': np.mean(waiting_times),
+                'max_waiting_time': np.max(waiting_times),
+                'min_waiting_time': np.min(waiting_times)
+            })
+
+        return stats
+
+
+def benchmark_servers(server_counts=(1, 10, 100, 500), events=200000, utilisation=0.9):
+    """
+    Events per second with c servers, arrival rate c * utilisation so every server stays busy
+    (about c busy departures in the calendar at any time).
+    """
+    results = {}
+    for c in server_counts:
+        sim = NonStationaryMMc(lambda t: c * utilisation, lambda t: 1.0, T_end=np.inf, servers=c,
+                               initial_queue_length=c, collect_waiting_times=False,
+                               max_departures=np.inf, record_history=False, rng=0)
+        start = time.perf_counter()
+        sim.queue.run(max_events=events)
+        results[c] = events / (time.perf_counter() - start)
+    return results
+
+
+if __name__ == "__main__":
+    results = benchmark_servers()
+    print(f"{'servers':>8} {'events/s':>12}")
+    for c, rate in results.items():
+        print(f"{c:>8} {rate:>12,.0f}")
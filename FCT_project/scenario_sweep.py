@@ -0,0 +1,195 @@
+"""
+Sweep over arrival-rate policies and queue parameters, e.g. the original vs the staggered school
+start times, instead of editing a notebook cell and rerunning the 50 simulations by hand.
+
+Every scenario's summary is cached on disk under a hash of its parameters and the seed, so
+rerunning a sweep after adding one scenario only simulates the new one. The replications of all
+scenarios that are not cached yet are spread over a process pool.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from scipy.stats import t as t_dist
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.intensity import GaussianPeakIntensity
+from common.running_stats import RunningStats
+from arrival_rates import BASE_RATE, ORIGINAL_PEAKS, STAGGERED_PEAKS
+from nonstationary_mm1 import NonStationaryMM1
+
+CACHE_DIR = Path(__file__).resolve().parent / 'data' / 'sweep_cache'
+CACHE_VERSION = 1  # bump when the simulator changes, so old summaries are not reused
+
+POLICIES = {
+    'original': ORIGINAL_PEAKS,
+    'staggered': STAGGERED_PEAKS,
+}
+
+SUMMARY_STATS = ('average_queue_length', 'max_queue_length', 'total_arrivals',
+                 'rejected_arrivals', 'average_waiting_time')
+
+
+def make_scenarios(policies=POLICIES, service_rates=(150,), max_queue_lengths=(20000,),
+                   n_replications=50, base_rate=BASE_RATE, T_end=1440, method='batch'):
+    """
+    Every combination of policy, service rate and max queue length as a list of scenario dicts.
+
+    Parameters:
+    - policies: {name: peaks} with peaks in the arrival_rates.py format
+    - service_rates: constant service rates (cars per minute)
+    - max_queue_lengths: queue capacities (None for unlimited)
+    - n_replications: simulations per scenario
+    - method: 'batch' (NonStationaryMM1.run_batch) or 'event' (run_simulation, event by event)
+    """
+    scenarios = []
+    for (name, peaks), mu, capacity in itertools.product(policies.items(), service_rates, max_queue_lengths):
+        scenarios.append({
+            'policy': name,
+            'peaks': peaks,
+            'base_rate': base_rate,
+            'service_rate': mu,
+            'max_queue_length': capacity,
+            'n_replications': n_replications,
+            'T_end': T_end,
+            'method': method,
+        })
+    return scenarios
+
+
+def scenario_key(scenario, seed):
+    """Hash of everything that affects a scenario's results (the policy name is only a label)"""
+    params = {k: v for k, v in scenario.items() if k != 'policy'}
+    text = json.dumps([CACHE_VERSION, params, seed], sort_keys=True, default=float)
+    return hashlib.sha256(text.encode()).hexdigest()[:20]
+
+
+def _run_replication(job):
+    """One simulation of one scenario, returns the per-minute queue length and the summary stats"""
+    scenario, seed = job
+    grid = np.arange(0, scenario['T_end'] + 1)
+    mu = scenario['service_rate']
+    sim = NonStationaryMM1(
+        arrival_rate_func=GaussianPeakIntensity(scenario['base_rate'], scenario['peaks']),
+        service_rate_func=lambda t: mu,
+        T_end=scenario['T_end'],
+        max_queue_length=scenario['max_queue_length'],
+        grid=grid,
+        record_history=False,
+        rng=seed,
+    )
+    if scenario['method'] == 'batch':
+        sim.run_batch()
+    elif scenario['method'] == 'event':
+        sim.run_simulation()
+    else:
+        raise ValueError(f"unknown method: {scenario['method']}")
+    stats = sim.get_statistics()
+    return sim.grid_statistics['queue_length'], [float(stats.get(name, np.nan)) for name in SUMMARY_STATS]
+
+
+def _summarise(scenario, replications):
+    """Combine the replications of one scenario (in replication order) into a flat dict of arrays"""
+    grid = np.arange(0, scenario['T_end'] + 1)
+    curve = RunningStats(shape=len(grid))
+    stats = RunningStats(shape=len(SUMMARY_STATS))
+    for queue_length, values in replications:
+        curve.push(queue_length)
+        stats.push(values)
+    # t * sem rather than stats.confidence_interval, which gives nan when a statistic never varies
+    half_width = t_dist.ppf(0.975, df=len(replications) - 1) * stats.sem()
+    return {
+        'time': grid,
+        'mean_queue': curve.mean,
+        'std_queue': curve.std(),
+        'stat_names': np.array(SUMMARY_STATS),
+        'stat_mean': stats.mean,
+        'stat_ci_half_width': half_width,
+    }
+
+
+def _load(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def _save(path, summary):
+    # write to a temporary file first so an interrupted sweep never leaves a half-written entry
+    tmp = path.with_name(path.stem + f'.{os.getpid()}.tmp.npz')
+    np.savez(tmp, **summary)
+    os.replace(tmp, path)
+
+
+def run_sweep(scenarios, seed=2024, workers=None, cache_dir=CACHE_DIR, refresh=False):
+    """
+    Run (or load from the cache) every scenario.
+
+    All scenarios use the same seed, so their replications share random streams (common random
+    numbers), which makes the differences between policies less noisy than the curves themselves,
+    and a scenario's result does not depend on which other scenarios are in the sweep.
+
+    Parameters:
+    - scenarios: list of scenario dicts, see make_scenarios
+    - seed: seed for SeedSequence, replication i of a scenario uses child i
+    - workers: number of processes (None for all cores, 1 to run in this process)
+    - cache_dir: where the summaries are stored (None to disable the cache)
+    - refresh: ignore cached summaries and recompute them
+
+    Returns a list of (scenario, summary) in the order of the scenarios.
+    """
+    if cache_dir is not None:
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    summaries = [None] * len(scenarios)
+    jobs, owners = [], []
+    for i, scenario in enumerate(scenarios):
+        if cache_dir is not None and not refresh:
+            path = cache_dir / f'{scenario_key(scenario, seed)}.npz'
+            if path.exists():
+                summaries[i] = _load(path)
+                continue
+        children = np.random.SeedSequence(seed).spawn(scenario['n_replications'])
+        jobs.extend((scenario, child) for child in children)
+        owners.extend([i] * len(children))
+
+    if jobs:
+        print(f"Simulating {len(set(owners))} of {len(scenarios)} scenarios ({len(jobs)} runs)")
+        if workers == 1:
+            results = [_run_replication(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_run_replication, jobs, chunksize=max(1, len(jobs) // 64)))
+
+        for i in sorted(set(owners)):
+            replications = [result for owner, result in zip(owners, results) if owner == i]
+            summaries[i] = _summarise(scenarios[i], replications)
+            if cache_dir is not None:
+                _save(cache_dir / f'{scenario_key(scenarios[i], seed)}.npz', summaries[i])
+
+    return list(zip(scenarios, summaries))
+
+
+def print_sweep(results):
+    """One row per scenario with the mean (± 95% CI half width) of each summary statistic"""
+    header = f"{'policy':<12} {'mu':>6} {'capacity':>9}"
+    for name in SUMMARY_STATS:
+        header += f" {name:>24}"
+    print(header)
+    for scenario, summary in results:
+        row = f"{scenario['policy']:<12} {scenario['service_rate']:>6} {str(scenario['max_queue_length']):>9}"
+        for mean, half_width in zip(summary['stat_mean'], summary['stat_ci_half_width']):
+            row += f" {f'{mean:.2f} ± {half_width:.2f}':>24}"
+        print(row)
+
+
+if __name__ == "__main__":
+    scenarios = make_scenarios(service_rates=(140, 150, 160))
+    results = run_sweep(scenarios)
+    print_sweep(results)
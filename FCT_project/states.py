@@ -1,40 +1,86 @@
 """
 Block for generating transition matricies from ./FCT_project/data/timeseries/25Oct-to-Nov
+
+Labels every 10 minute reading Low / Medium / High by the quantiles of that day's travel times.
+The raw CSVs are left alone: labelled copies go to ./FCT_project/data/derived/<name>, with a
+manifest of what each output was built from (file hash + quantiles + thresholds), so a rerun
+only processes new or changed days.
 """
 
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-import os
-
-def convert_to_minutes(travel_time):
-    """Convert travel time in e.g '1 hour 30 mins' format -> total minutes."""
-    time_parts = travel_time.split()
-    hours = int(time_parts[0])
-    minutes = int(time_parts[2])
-    return hours * 60 + minutes
-
-def assign_state(minutes, low_threshold, high_threshold):
-    """Assign a state based on travel time in minutes."""
-    if minutes < low_threshold:
-        return 'Low'
-    elif low_threshold <= minutes <= high_threshold:
-        return 'Medium'
-    else:
-        return 'High'
-
-def categorize_and_append_states(file_path):
-    """Categorize travel times into states and append the states to the CSV file."""
-    df = pd.read_csv(file_path)
-    df['Travel Minutes'] = df['Travel Time'].apply(convert_to_minutes)
-    
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.travel_store import STATE_NAMES, file_hash, parse_duration
+
+QUANTILES = (0.6, 0.9)
+
+
+def assign_states(minutes, low_threshold, high_threshold):
+    """
+    State codes (index into STATE_NAMES) for an array of travel minutes:
+    Low below low_threshold, Medium from low to high_threshold inclusive, High above, and -1
+    (no state) where the minutes are nan, e.g. a 'NOT FOUND' reading.
+    Two comparisons, since neither pd.cut closing convention puts both thresholds in Medium.
+    """
+    minutes = np.asarray(minutes, dtype=float)
+    codes = (minutes >= low_threshold).astype(np.int8) + (minutes > high_threshold)
+    codes[np.isnan(minutes)] = -1
+    return codes
+
+
+def categorize_states(df, quantiles=QUANTILES):
+    """Add 'Travel Minutes' and 'State' to one day's data, returns (labelled copy, thresholds)"""
+    df = df[['Date and Time', 'Travel Time']].copy()
+    minutes = parse_duration(df['Travel Time'])
     # Define bins for Low, Medium, High using quantiles for each dataset separately
-    low_threshold, high_threshold = df['Travel Minutes'].quantile([0.6, 0.9]).tolist()
-    df['State'] = df['Travel Minutes'].apply(assign_state, args=(low_threshold, high_threshold))
-    df.to_csv(file_path, index=False)
+    low_threshold, high_threshold = np.quantile(minutes[~np.isnan(minutes)], quantiles)
+    df['Travel Minutes'] = pd.array(minutes, dtype='Int64')  # whole minutes, written without .0
+    # code -1 picks the trailing '', so unreadable readings are left without a state
+    df['State'] = np.array(STATE_NAMES + ('',))[assign_states(minutes, low_threshold, high_threshold)]
+    return df, (float(low_threshold), float(high_threshold))
+
+
+def process_directory(source_dir, output_dir=None, quantiles=QUANTILES, force=False):
+    """
+    Label every CSV in source_dir into output_dir (default ./FCT_project/data/derived/<name>).
+    Days whose raw file and quantiles match the manifest are skipped, outputs of raw files that
+    no longer exist are removed. Returns the names of the files that were (re)processed.
+    """
+    source_dir = Path(source_dir)
+    if output_dir is None:
+        output_dir = source_dir.parent.parent / 'derived' / source_dir.name
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / 'manifest.json'
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    processed = []
+    current = {}
+    for path in sorted(source_dir.glob('*.csv')):
+        digest = file_hash(path)
+        entry = manifest.get(path.name)
+        if (not force and entry is not None and entry['sha1'] == digest
+                and entry['quantiles'] == list(quantiles) and (output_dir / path.name).exists()):
+            current[path.name] = entry
+            continue
+        labelled, thresholds = categorize_states(pd.read_csv(path, dtype=str), quantiles)
+        labelled.to_csv(output_dir / path.name, index=False)
+        current[path.name] = {'sha1': digest, 'quantiles': list(quantiles), 'thresholds': list(thresholds)}
+        processed.append(path.name)
+
+    for name in manifest.keys() - current.keys():
+        (output_dir / name).unlink(missing_ok=True)
+    manifest_path.write_text(json.dumps(current, indent=1))
+    return processed
 
 
-# iterate script over these 
-directory = './FCT_project/data/timeseries/25Oct-to-Nov'
-for filename in os.listdir(directory):
-    if filename.endswith('.csv'):
-        file_path = os.path.join(directory, filename)
-        categorize_and_append_states(file_path)
\ No newline at end of file
+# iterate script over these
+if __name__ == "__main__":
+    directory = './FCT_project/data/timeseries/25Oct-to-Nov'
+    processed = process_directory(directory)
+    print(f"Labelled {len(processed)} new or changed files")
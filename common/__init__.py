@@ -0,0 +1,6 @@
+"""
+Shared helpers used by the portfolio scripts and the FCT project.
+
+The portfolio scripts are run from the repository root (e.g. `python portfolio_IX/...py`),
+so they add the root to sys.path before importing from here.
+"""
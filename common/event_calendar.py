@@ -0,0 +1,106 @@
+"""
+Generic discrete-event core: a binary-heap event calendar plus a loop that hands each event to the
+handler registered for its kind.
+
+The simulators so far track exactly one next arrival and one next departure, which is fine for a
+single server but not for c servers (polling booths, road lanes), where every busy server has its
+own departure pending. The calendar holds any number of pending events, O(log n) to schedule or pop.
+"""
+
+import heapq
+import itertools
+
+import numpy as np
+
+
+class EventCalendar:
+    def __init__(self):
+        """Pending events ordered by time; events at the same time come out in the order scheduled"""
+        self._heap = []
+        self._ids = itertools.count()
+        self._live = set()       # ids scheduled and not yet popped or cancelled
+        self._cancelled = set()  # ids cancelled but still in the heap
+
+    def schedule(self, time, kind, data=None):
+        """Add an event, returns its id (for cancel)"""
+        event_id = next(self._ids)
+        heapq.heappush(self._heap, (time, event_id, kind, data))
+        self._live.add(event_id)
+        return event_id
+
+    def cancel(self, event_id):
+        """
+        Cancel a pending event (lazily: it is dropped when it reaches the top of the heap).
+        Ids that are unknown, already popped or already cancelled are ignored.
+        """
+        if event_id in self._live:
+            self._live.remove(event_id)
+            self._cancelled.add(event_id)
+
+    def _drop_cancelled(self):
+        while self._heap and self._heap[0][1] in self._cancelled:
+            self._cancelled.remove(heapq.heappop(self._heap)[1])
+
+    def peek_time(self):
+        """Time of the next event, inf if there is none"""
+        if self._cancelled:
+            self._drop_cancelled()
+        return self._heap[0][0] if self._heap else np.inf
+
+    def pop(self):
+        """Remove and return the next event as (time, kind, data)"""
+        if self._cancelled:
+            self._drop_cancelled()
+        time, event_id, kind, data = heapq.heappop(self._heap)
+        self._live.discard(event_id)
+        return time, kind, data
+
+    def __len__(self):
+        return len(self._live)
+
+
+class EventSimulation:
+    def __init__(self):
+        """
+        Event loop with pluggable handlers. Subclasses (or users) register a handler per event kind
+        with on(), schedule the first events, then call run().
+        """
+        self.calendar = EventCalendar()
+        self.handlers = {}
+        self.now = 0.0
+        self.events_processed = 0
+        self._stopped = False
+
+    def on(self, kind, handler):
+        """Register handler(time, data) for events of the given kind"""
+        self.handlers[kind] = handler
+
+    def schedule(self, time, kind, data=None):
+        return self.calendar.schedule(time, kind, data)
+
+    def stop(self):
+        """Called from a handler: run() returns after the current event"""
+        self._stopped = True
+
+    def run(self, until=np.inf, max_events=None, before_event=None):
+        """
+        Process events in time order until the calendar is empty, the next event is after `until`
+        or max_events have been processed (or a handler calls stop()).
+
+        before_event(time) is called before each event is handled, while the state still holds the
+        values from self.now up to time (use it for time-weighted statistics or histories).
+        """
+        calendar, handlers = self.calendar, self.handlers
+        processed = 0
+        self._stopped = False
+        while len(calendar) and not self._stopped and (max_events is None or processed < max_events):
+            if calendar.peek_time() > until:
+                break
+            time, kind, data = calendar.pop()
+            if before_event is not None:
+                before_event(time)
+            self.now = time
+            handlers[kind](time, data)
+            processed += 1
+        self.events_processed += processed
+        return processed
@@ -0,0 +1,146 @@
+"""
+Deterministic approximations of the mean queue length of a time-varying queue, for screening
+scenarios without Monte Carlo:
+
+- fluid: dq/dt = lambda(t) - mu(t) 1[q > 0], i.e. the net inflow with q kept at or above 0
+  (and at or below the capacity). Right when the queue is overloaded, 0 when it never is.
+- pointwise stationary (PSA): the stationary M/M/c mean number in system at the current rates,
+  L(t) = L_stationary(lambda(t), mu(t)). Right when the rates change slowly compared with how fast
+  the queue relaxes, infinite during overload unless the capacity is finite.
+- combined: PSA while the fluid queue is empty and the fluid backlog (or the PSA value if that is
+  larger) while it is not.
+
+The rate functions are the same callables the simulators use and must accept numpy arrays
+(a constant service rate function may return a scalar).
+"""
+
+import numpy as np
+
+
+def _on_grid(rate, t):
+    return np.broadcast_to(np.asarray(rate(t), dtype=float), t.shape)
+
+
+def fluid_queue(arrival_rate, service_rate, t, q0=0.0, servers=1, capacity=None):
+    """
+    Fluid queue on the time grid t (the rates are integrated with the trapezoid rule between grid
+    points). c servers drain at c mu(t). Without a capacity this is the reflection
+    q(t) = X(t) - min(0, min_{s <= t} X(s)) of the net input X, one cumsum and one running min.
+    """
+    t = np.asarray(t, dtype=float)
+    net = _on_grid(arrival_rate, t) - servers * _on_grid(service_rate, t)
+    increments = 0.5 * (net[1:] + net[:-1]) * np.diff(t)
+    if capacity is None:
+        X = q0 + np.concatenate([[0.0], np.cumsum(increments)])
+        return X - np.minimum(0.0, np.minimum.accumulate(X))
+    q = np.empty(len(t))
+    q[0] = min(q0, capacity)
+    for k, dx in enumerate(increments):
+        q[k + 1] = min(max(q[k] + dx, 0.0), capacity)
+    return q
+
+
+def stationary_mean(arrival_rate, service_rate, servers=1, capacity=None, chunk_size=256):
+    """
+    Mean number in system of a stationary M/M/c (capacity None) or M/M/c/K queue, elementwise
+    over arrays of rates. inf where an uncapacitated queue is overloaded.
+    """
+    lam, mu = np.broadcast_arrays(np.asarray(arrival_rate, dtype=float), np.asarray(service_rate, dtype=float))
+    a = lam / mu  # offered load
+    rho = a / servers
+
+    if capacity is None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Erlang B by its recursion, then Erlang C for the probability of waiting
+            B = np.ones_like(a)
+            for k in range(1, servers + 1):
+                B = a * B / (k + a * B)
+            C = B / (1 - rho * (1 - B))
+            L = C * rho / (1 - rho) + a
+        return np.where(rho < 1, L, np.inf)
+
+    if servers == 1:
+        # closed form for M/M/1/K, overloaded queues through the mirror image L = K - L(mu, lambda)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = np.minimum(rho, 1 / rho)
+            L = r / (1 - r) - (capacity + 1) * r ** (capacity + 1) / (1 - r ** (capacity + 1))
+            L = np.where(rho > 1, capacity - L, L)
+        return np.where(np.isclose(rho, 1), capacity / 2, L)
+
+    # general birth-death chain, p_k proportional to prod lambda / (min(k, c) mu), in log space and
+    # in chunks of rates so the (rates x states) table stays small
+    k = np.arange(capacity + 1)
+    log_steps = -np.log(np.minimum(np.maximum(k, 1), servers))
+    log_steps[0] = 0.0
+    log_denominator = np.cumsum(log_steps)
+    flat_a = a.ravel()
+    L = np.empty(len(flat_a))
+    for start in range(0, len(flat_a), chunk_size):
+        log_a = np.log(flat_a[start:start + chunk_size])[:, None]
+        log_p = k * log_a + log_denominator
+        log_p -= log_p.max(axis=1, keepdims=True)
+        p = np.exp(log_p)
+        L[start:start + chunk_size] = (p @ k) / p.sum(axis=1)
+    return L.reshape(a.shape)
+
+
+def pointwise_stationary(arrival_rate, service_rate, t, servers=1, capacity=None):
+    """PSA mean number in system on the time grid t"""
+    t = np.asarray(t, dtype=float)
+    return stationary_mean(_on_grid(arrival_rate, t), _on_grid(service_rate, t), servers, capacity)
+
+
+def approximate_queue(arrival_rate, service_rate, t, method='combined', q0=0.0, servers=1, capacity=None):
+    """
+    Mean queue length (number in system) curve on the time grid t.
+
+    Parameters:
+    - arrival_rate, service_rate: lambda(t) and mu(t) (per server), as passed to the simulators
+    - t: time grid, e.g. np.arange(0, 1441) for every minute of the day
+    - method: 'fluid', 'psa' or 'combined'
+    - q0: queue length at t[0] (fluid and combined)
+    - servers: number of servers c
+    - capacity: maximum number in the system (None for unlimited)
+    """
+    if method == 'fluid':
+        return fluid_queue(arrival_rate, service_rate, t, q0, servers, capacity)
+    if method == 'psa':
+        return pointwise_stationary(arrival_rate, service_rate, t, servers, capacity)
+    if method == 'combined':
+        fluid = fluid_queue(arrival_rate, service_rate, t, q0, servers, capacity)
+        psa = pointwise_stationary(arrival_rate, service_rate, t, servers, capacity)
+        psa = np.where(np.isfinite(psa), psa, 0)  # overloaded, the fluid backlog takes over
+        return np.where(fluid > 0, np.maximum(fluid, psa), psa)
+    raise ValueError(f"unknown method: {method}")
+
+
+def error_report(approximation, simulated, t, simulated_std=None):
+    """
+    How far an approximate mean curve is from a simulated one (both on the grid t).
+
+    Returns a dict with the mean absolute and root mean square errors, the largest error and
+    when it happens, the relative error of the time-averaged queue length, the peak values and
+    the gap between peak times. With simulated_std (the across-replication std of the queue
+    length), also the share of grid points where the approximation is within one std.
+    """
+    approximation = np.asarray(approximation, dtype=float)
+    simulated = np.asarray(simulated, dtype=float)
+    t = np.asarray(t, dtype=float)
+    error = approximation - simulated
+    finite = np.isfinite(error)
+    dt = np.gradient(t)  # time each grid point stands for
+    worst = np.argmax(np.where(finite, np.abs(error), -1))
+    report = {
+        'mae': np.mean(np.abs(error[finite])),
+        'rmse': np.sqrt(np.mean(error[finite] ** 2)),
+        'max_error': error[worst],
+        'max_error_time': t[worst],
+        'relative_error_of_mean': np.sum(error[finite] * dt[finite]) / np.sum(simulated[finite] * dt[finite]),
+        'peak_simulated': simulated.max(),
+        'peak_approximation': approximation.max(),
+        'peak_time_gap': t[np.argmax(approximation)] - t[np.argmax(simulated)],
+        'infinite_points': int(np.sum(~finite)),
+    }
+    if simulated_std is not None:
+        report['within_one_std'] = np.mean(np.abs(error) <= np.asarray(simulated_std))
+    return report
@@ -0,0 +1,93 @@
+"""
+Batch solver for a single-server FIFO queue.
+
+Once the arrival times and service requirements are known, the departure times follow the
+Lindley recursion D_n = max(A_n, D_{n-1}) + S_n, which has the closed form
+
+    D_n = C_n + max_{k <= n} (A_k - C_{k-1}),   C_n = S_1 + ... + S_n
+
+so the whole day is a cumsum and a running maximum. The number in the system at any time is then
+two searchsorted calls. A finite capacity makes admission depend on the state, which is handled
+by solving chunk by chunk and restarting after each rejected arrival.
+"""
+
+import numpy as np
+
+
+def _departures(arrival_times, service_times, server_free):
+    """Departure times of consecutive admitted customers, server free from server_free onwards"""
+    cumulative = np.cumsum(service_times)
+    before = cumulative - service_times  # C_{k-1}
+    start_offsets = np.maximum.accumulate(arrival_times - before)
+    start_offsets = np.maximum(start_offsets, server_free)
+    return cumulative + start_offsets
+
+
+def lindley_queue(arrival_times, service_times, capacity=None, chunk_size=4096):
+    """
+    Solve a FIFO single-server queue.
+
+    Parameters:
+    - arrival_times: sorted arrival times
+    - service_times: service requirement of each arrival
+    - capacity: maximum number in the system (including the one in service), None for unlimited
+    - chunk_size: starting chunk length for the finite-capacity solver
+
+    Returns a dict of arrays with one entry per arrival:
+    - admitted: False for arrivals turned away because the system was full
+    - departures: departure times (nan if rejected)
+    - waits: time spent waiting before service starts (nan if rejected)
+    """
+    arrival_times = np.asarray(arrival_times, dtype=float)
+    service_times = np.asarray(service_times, dtype=float)
+    n = len(arrival_times)
+
+    if capacity is None:
+        departures = _departures(arrival_times, service_times, -np.inf)
+        admitted = np.ones(n, dtype=bool)
+    else:
+        admitted = np.zeros(n, dtype=bool)
+        departures = np.full(n, np.nan)
+        pending = np.empty(0)   # departure times of admitted customers still to leave, sorted
+        server_free = -np.inf
+        start, chunk = 0, chunk_size
+        while start < n:
+            stop = min(start + chunk, n)
+            arrivals = arrival_times[start:stop]
+            tentative = _departures(arrivals, service_times[start:stop], server_free)
+
+            # number in the system just before each arrival if everyone so far in the chunk got in
+            earlier_in_chunk = np.arange(stop - start) - np.searchsorted(tentative, arrivals, side='right')
+            from_before = len(pending) - np.searchsorted(pending, arrivals, side='right')
+            full = np.flatnonzero(earlier_in_chunk + from_before >= capacity)
+
+            accepted = stop - start if len(full) == 0 else full[0]
+            admitted[start:start + accepted] = True
+            departures[start:start + accepted] = tentative[:accepted]
+            if accepted > 0:
+                server_free = tentative[accepted - 1]
+                pending = np.concatenate([pending, tentative[:accepted]])
+            if len(full) == 0:
+                start = stop
+                chunk = min(2 * chunk, 1 << 20)
+            else:
+                start += accepted + 1  # skip the rejected arrival
+                chunk = max(chunk // 2, 16)
+            # anyone gone by the next arrival no longer counts towards the capacity
+            if start < n:
+                pending = pending[np.searchsorted(pending, arrival_times[start], side='right'):]
+
+    waits = departures - service_times - arrival_times
+    waits[~admitted] = np.nan
+    return {'admitted': admitted, 'departures': departures, 'waits': waits}
+
+
+def number_in_system(arrival_times, departure_times, t, side='right'):
+    """
+    Number of customers in the system at time(s) t for a FIFO single server, given the arrival and
+    departure times of admitted customers. side='left' gives the value just before t.
+    """
+    arrival_times = np.asarray(arrival_times)
+    departure_times = np.asarray(departure_times)
+    return (np.searchsorted(arrival_times, t, side=side)
+            - np.searchsorted(departure_times, t, side=side))
@@ -0,0 +1,95 @@
+"""
+M(t)/M/c queue on top of the event calendar: time-varying arrivals, c identical servers, one FIFO
+waiting line and an optional capacity on the number in the system.
+
+The arrival process and the service times are passed in as callables, so the polling station
+(portfolio IX, thinning from a piecewise envelope) and the FCT traffic model (rate at the current
+time) keep their own arrival generators.
+"""
+
+from array import array
+from collections import deque
+
+from common.event_calendar import EventSimulation
+
+
+class MultiServerQueue(EventSimulation):
+    def __init__(self, next_arrival, service_time, servers=1, capacity=None,
+                 initial_number=0, collect_waiting_times=True, max_departures=None):
+        """
+        Parameters:
+        - next_arrival: next_arrival(t) gives the first arrival time after t, or None when there are no more
+        - service_time: service_time(t) draws the service requirement of a customer starting service at t
+        - servers: number of servers c
+        - capacity: maximum number in the system, waiting plus in service (None for unlimited)
+        - initial_number: customers present at time 0 (arrived at time 0)
+        - collect_waiting_times: keep the wait before service and the time in system of every customer
+        - max_departures: stop the run after this many departures (None for no limit)
+        """
+        super().__init__()
+        if servers < 1:
+            raise ValueError("need at least one server")
+        self.next_arrival = next_arrival
+        self.service_time = service_time
+        self.servers = servers
+        self.capacity = capacity
+        self.max_departures = max_departures
+
+        self.number_in_system = 0
+        self.busy = 0
+        self.waiting = deque()  # arrival times of customers waiting for a server, oldest first
+        self.arrivals = 0       # admitted arrivals
+        self.rejected = 0
+        self.departures = 0
+        self.max_number_in_system = 0
+        self.waiting_times = array('d') if collect_waiting_times else None
+        self.sojourn_times = array('d') if collect_waiting_times else None
+
+        self.on('arrival', self._arrival)
+        self.on('departure', self._departure)
+        for _ in range(initial_number):
+            self._admit(0.0)
+        first = next_arrival(0.0)
+        if first is not None:
+            self.schedule(first, 'arrival')
+
+    def _start_service(self, t, arrived):
+        self.busy += 1
+        if self.waiting_times is not None:
+            self.waiting_times.append(t - arrived)
+        # the departure carries the arrival time, since with c > 1 customers can overtake each other
+        self.schedule(t + self.service_time(t), 'departure', arrived)
+
+    def _admit(self, t):
+        self.number_in_system += 1
+        self.max_number_in_system = max(self.max_number_in_system, self.number_in_system)
+        if self.busy < self.servers:
+            self._start_service(t, t)
+        else:
+            self.waiting.append(t)
+
+    def _arrival(self, t, _):
+        if self.capacity is None or self.number_in_system < self.capacity:
+            self.arrivals += 1
+            self._admit(t)
+        else:
+            self.rejected += 1
+        following = self.next_arrival(t)
+        if following is not None:
+            self.schedule(following, 'arrival')
+
+    def _departure(self, t, arrived):
+        self.number_in_system -= 1
+        self.busy -= 1
+        self.departures += 1
+        if self.sojourn_times is not None:
+            self.sojourn_times.append(t - arrived)
+        if self.waiting:
+            self._start_service(t, self.waiting.popleft())
+        if self.max_departures is not None and self.departures >= self.max_departures:
+            self.stop()
+
+    @property
+    def queue_length(self):
+        """Customers waiting for a server (not counting those in service)"""
+        return len(self.waiting)
@@ -0,0 +1,108 @@
+"""
+One-pass (streaming) mean and variance.
+
+Simulators push observations in as they are produced instead of storing them and calling
+np.mean / np.var at the end. Accumulators built in different processes can be merged.
+"""
+
+import numpy as np
+from scipy import stats
+
+
+class RunningStats:
+    def __init__(self, shape=()):
+        """
+        Streaming moment accumulator (weighted Welford update, Chan et al. parallel merge)
+
+        Parameters:
+        - shape: shape of one observation, () for scalars or e.g. (3,) for a vector of
+                 state probabilities. Every component is tracked independently.
+        """
+        self.shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        self.count = 0                      # number of observations pushed
+        self.total_weight = 0.0             # sum of weights (== count when unweighted)
+        self._mean = np.zeros(self.shape)
+        self._m2 = np.zeros(self.shape)     # weighted sum of squared deviations from the mean
+
+    def push(self, x, weight=1.0):
+        """
+        Add one observation. Use weight=dt for time-weighted averages, e.g. the length of time
+        a queue spent at length x.
+        """
+        if weight <= 0:
+            return
+        x = np.asarray(x, dtype=float)
+        self.count += 1
+        self.total_weight += weight
+        delta = x - self._mean
+        self._mean = self._mean + (weight / self.total_weight) * delta
+        self._m2 = self._m2 + weight * delta * (x - self._mean)
+
+    def push_batch(self, xs, weights=None):
+        """Add a batch of observations stacked along axis 0 (computed with numpy then merged)"""
+        xs = np.asarray(xs, dtype=float).reshape((-1,) + self.shape)
+        if len(xs) == 0:
+            return
+        if weights is None:
+            batch_mean = xs.mean(axis=0)
+            batch_m2 = ((xs - batch_mean) ** 2).sum(axis=0)
+            batch_weight = float(len(xs))
+        else:
+            weights = np.asarray(weights, dtype=float)
+            batch_weight = weights.sum()
+            if batch_weight <= 0:
+                return
+            w = weights.reshape((-1,) + (1,) * len(self.shape))
+            batch_mean = (w * xs).sum(axis=0) / batch_weight
+            batch_m2 = (w * (xs - batch_mean) ** 2).sum(axis=0)
+        self._combine(len(xs), batch_weight, batch_mean, batch_m2)
+
+    def merge(self, other):
+        """Fold another accumulator (e.g. from a worker process) into this one"""
+        if other.shape != self.shape:
+            raise ValueError(f"cannot merge shapes {other.shape} and {self.shape}")
+        self._combine(other.count, other.total_weight, other._mean, other._m2)
+        return self
+
+    def _combine(self, count, weight, mean, m2):
+        if weight <= 0:
+            return
+        total = self.total_weight + weight
+        delta = mean - self._mean
+        self._mean = self._mean + delta * (weight / total)
+        self._m2 = self._m2 + m2 + delta ** 2 * (self.total_weight * weight / total)
+        self.count += count
+        self.total_weight = total
+
+    @property
+    def mean(self):
+        if self.count == 0:
+            return np.full(self.shape, np.nan)
+        return self._mean.copy() if self.shape else float(self._mean)
+
+    def variance(self, ddof=1):
+        """
+        Variance of the observations. ddof=1 gives the unbiased sample variance for unweighted
+        data; use ddof=0 for time-weighted averages.
+        """
+        if self.total_weight - ddof <= 0:
+            return np.full(self.shape, np.nan) if self.shape else np.nan
+        var = self._m2 / (self.total_weight - ddof)
+        return var if self.shape else float(var)
+
+    def std(self, ddof=1):
+        return np.sqrt(self.variance(ddof))
+
+    def sem(self):
+        """Standard error of the mean (same as scipy.stats.sem for unweighted data), nan while empty"""
+        if self.count == 0:
+            return np.full(self.shape, np.nan) if self.shape else np.nan
+        return np.sqrt(self.variance(ddof=1) / self.count)
+
+    def confidence_interval(self, confidence=0.95):
+        """Student-t confidence interval for the mean, returns (lower, upper)"""
+        return stats.t.interval(confidence=confidence, df=self.count - 1,
+                                loc=self.mean, scale=self.sem())
+
+    def __repr__(self):
+        return f"RunningStats(count={self.count}, mean={self.mean}, variance={self.variance()})"
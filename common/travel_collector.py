@@ -0,0 +1,243 @@
+"""
+Concurrent travel time collector for the Google Directions API.
+
+The old collector sent one blocking request per 10-minute departure slot, each on a fresh
+connection, so a backfill of several routes and days took as long as all the round trips added
+up. Here every slot of every job is fanned out over a thread pool sharing one pooled
+requests.Session. A token bucket keeps the total request rate under a limit, and failed
+requests (connection errors, HTTP 429 / 5xx, OVER_QUERY_LIMIT) are retried with jittered
+exponential backoff.
+
+base_url can point at a local stub server that returns the same JSON shape
+({"status": "OK", "routes": [{"legs": [{"duration_in_traffic": {"text": ..., "value": ...}}]}]}).
+"""
+
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+DIRECTIONS_URL = "https://maps.googleapis.com/maps/api/directions/json"
+RETRY_HTTP_CODES = {429, 500, 502, 503, 504}
+RETRY_API_STATUSES = {'OVER_QUERY_LIMIT', 'UNKNOWN_ERROR'}
+
+
+class RateLimiter:
+    def __init__(self, rate, burst=1):
+        """
+        Token bucket shared by all worker threads.
+
+        Parameters:
+        - rate: requests per second (None for no limit)
+        - burst: how many requests may go out back to back after an idle spell
+        """
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        if self.rate is None:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RequestFailed(Exception):
+    """A departure slot that could not be fetched (after any retries)"""
+
+
+def departure_times(start_time, end_time, interval):
+    """Departure times from start_time to end_time inclusive, every interval minutes"""
+    times = []
+    current_time = start_time
+    while current_time <= end_time:
+        times.append(current_time)
+        current_time += timedelta(minutes=interval)
+    return times
+
+
+def daily_jobs(routes, first_day, last_day, interval=10):
+    """
+    One job per route and day, midnight to the next midnight inclusive (145 slots at 10 minutes,
+    like the files in FCT_project/data/timeseries).
+
+    Parameters:
+    - routes: list of (origin, destination)
+    - first_day, last_day: dates or datetimes (inclusive)
+    """
+    first = datetime(first_day.year, first_day.month, first_day.day)
+    last = datetime(last_day.year, last_day.month, last_day.day)
+    jobs = []
+    day = first
+    while day <= last:
+        for origin, destination in routes:
+            jobs.append((origin, destination, day, day + timedelta(days=1), interval))
+        day += timedelta(days=1)
+    return jobs
+
+
+class TravelTimeCollector:
+    def __init__(self, api_key, requests_per_second=10, max_workers=8, max_retries=4,
+                 backoff=0.5, max_backoff=30, timeout=10, base_url=DIRECTIONS_URL,
+                 verbose=True, rng=None):
+        """
+        Parameters:
+        - api_key: Google Cloud API key
+        - requests_per_second: limit on the total request rate over all threads (None for no limit)
+        - max_workers: number of requests in flight at once (also the connection pool size)
+        - max_retries: retries per departure slot after the first attempt
+        - backoff, max_backoff: retry k waits a uniform random time up to min(max_backoff, backoff * 2^k)
+          seconds, or what the server asks for in a Retry-After header (at most max_backoff)
+        - timeout: seconds to wait for each response
+        - base_url: Directions endpoint, e.g. a local stub server for testing
+        - verbose: print each travel time as it arrives
+        - rng: numpy Generator, or a seed to build one (for the backoff jitter)
+        """
+        self.api_key = api_key
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.base_url = base_url
+        self.verbose = verbose
+        self.limiter = RateLimiter(requests_per_second)
+        self.rng = np.random.default_rng(rng)
+        self._rng_lock = threading.Lock()
+        self._count_lock = threading.Lock()
+
+        # one session for all threads, keeping up to max_workers connections alive
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.requests_sent = 0
+        self.retries = 0
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _wait_before_retry(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                delay = min(max(float(retry_after), 0), self.max_backoff)
+            except ValueError:
+                delay = self.backoff
+        else:
+            with self._rng_lock:
+                delay = self.rng.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        time.sleep(delay)
+
+    def fetch(self, origin, destination, departure):
+        """
+        Travel time in traffic for one departure, returns the duration text (e.g. '1 hour 28 mins').
+        Raises RequestFailed when the request keeps failing or the API refuses it.
+        """
+        params = {'origin': origin, 'destination': destination,
+                  'departure_time': int(departure.timestamp()), 'key': self.api_key}
+        problem = None
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                with self._count_lock:
+                    self.retries += 1
+                self._wait_before_retry(attempt - 1, retry_after)
+            retry_after = None
+            self.limiter.acquire()
+            with self._count_lock:
+                self.requests_sent += 1
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            except requests.RequestException as error:
+                # connection errors, timeouts, broken chunked / compressed bodies
+                problem = f"{type(error).__name__}: {error}"
+                continue
+
+            if response.status_code != 200:
+                problem = f"Request failed with status code: {response.status_code}"
+                if response.status_code in RETRY_HTTP_CODES:
+                    retry_after = response.headers.get('Retry-After')
+                    continue
+                break
+            try:
+                data = response.json()
+                status = data['status']
+                if status == 'OK':
+                    leg = data['routes'][0]['legs'][0]
+                    return leg.get('duration_in_traffic', {}).get('text', 'NOT FOUND')
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError) as error:
+                # not JSON (e.g. an HTML error page) or not the Directions shape, don't retry
+                problem = f"Malformed response ({type(error).__name__}: {error})"
+                break
+            problem = f"Error in response: {status}. Details: {data.get('error_message', 'No additional details')}"
+            if status not in RETRY_API_STATUSES:
+                break
+        raise RequestFailed(problem)
+
+    def _fetch_slot(self, slot):
+        job_index, origin, destination, departure = slot
+        try:
+            duration = self.fetch(origin, destination, departure)
+        except RequestFailed as error:
+            if self.verbose:
+                print(f"{origin} -> {destination} at {departure}: {error}")
+            return job_index, departure, None, str(error)
+        if self.verbose:
+            print(f"Travel time at {departure}: {duration}")
+        return job_index, departure, duration, None
+
+    def collect(self, jobs):
+        """
+        Fetch every departure slot of every job concurrently.
+
+        Parameters:
+        - jobs: list of (origin, destination, start_time, end_time, interval), see daily_jobs
+
+        Returns one dict per job, in the order of the jobs:
+        - rows: [(time string, duration text)] for the slots that succeeded, in time order
+        - errors: [(departure, message)] for the slots that failed
+        """
+        slots = [(i, origin, destination, departure)
+                 for i, (origin, destination, start_time, end_time, interval) in enumerate(jobs)
+                 for departure in departure_times(start_time, end_time, interval)]
+        results = [{'rows': [], 'errors': []} for _ in jobs]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # map keeps the slot order, so rows come back sorted by departure within each job
+            for job_index, departure, duration, error in pool.map(self._fetch_slot, slots):
+                if error is None:
+                    results[job_index]['rows'].append([departure.strftime("%Y-%m-%d %H:%M:%S"), duration])
+                else:
+                    results[job_index]['errors'].append((departure, error))
+        return results
+
+
+def write_rows(filepath, rows):
+    """Save collected rows in the timeseries CSV format"""
+    os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+    with open(filepath, 'w', newline='') as csvfile:
+        csvwriter = csv.writer(csvfile)
+        csvwriter.writerow(['Date and Time', 'Travel Time'])
+        csvwriter.writerows(rows)
@@ -0,0 +1,170 @@
+"""
+Columnar store for the FCT travel time series (one CSV per route and day, one row every 10 minutes).
+
+build_store packs a directory of day files into a few .npy arrays:
+
+- minutes: (days, 145) float32 travel minutes, slot j is j * 10 minutes after midnight (slot 144
+  is the closing midnight observation every file ends with), nan where a slot is missing
+- states: (days, 145) int8 codes into STATE_NAMES, -1 where there is no state
+- dates: (days,) datetime64[D], routes: (days,) e.g. 'Enn-Bel', files: (days,) file names
+
+load_store memory-maps them, so analysis scripts slice days and slots without any CSV or
+datetime parsing. The store is rebuilt when a CSV is added, removed or changed: files are
+compared by size and modification time first, and by content hash when only the time differs.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SLOT_MINUTES = 10
+SLOTS = 24 * 60 // SLOT_MINUTES + 1  # 144 slots in a day plus the closing midnight
+STATE_NAMES = ('Low', 'Medium', 'High')
+STORE_VERSION = 1
+
+
+def default_store_dir(source_dir):
+    """FCT_project/data/<kind>/<name> -> FCT_project/data/store/<kind>/<name>"""
+    source_dir = Path(source_dir).resolve()
+    return source_dir.parent.parent / 'store' / source_dir.parent.name / source_dir.name
+
+
+def parse_duration(text):
+    """Durations like '1 hour 28 mins', '2 hours 5 mins' or '58 mins' to minutes (vectorised, nan if unparseable)"""
+    parts = pd.Series(text, dtype='string').str.extract(
+        r'^\s*(?:(?P<hours>\d+)\s*hours?)?\s*(?:(?P<minutes>\d+)\s*mins?)?\s*$')
+    hours = pd.to_numeric(parts['hours']).fillna(0)
+    minutes = pd.to_numeric(parts['minutes']).fillna(0)
+    valid = parts['hours'].notna() | parts['minutes'].notna()
+    return np.where(valid, hours * 60 + minutes, np.nan)
+
+
+def file_hash(path):
+    """sha1 of a file's contents"""
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()
+
+
+def _fingerprints(source_dir):
+    return {path.name: {'size': path.stat().st_size, 'mtime_ns': path.stat().st_mtime_ns}
+            for path in sorted(Path(source_dir).glob('*.csv'))}
+
+
+def _read_day(path):
+    """One day file -> (date, route, minutes[SLOTS], state codes[SLOTS])"""
+    df = pd.read_csv(path, dtype=str)
+    # numpy reads the 'YYYY-MM-DD HH:MM:SS' stamps directly, much faster than pd.to_datetime
+    stamps = df['Date and Time'].to_numpy(dtype=str).astype('datetime64[m]')
+    day = stamps[0].astype('datetime64[D]')
+    slots = (stamps - day).astype(int) // SLOT_MINUTES
+
+    if 'Travel Minutes' in df.columns:
+        travel = pd.to_numeric(df['Travel Minutes'], errors='coerce').to_numpy(dtype=float)
+    else:
+        travel = parse_duration(df['Travel Time'])
+    codes = np.full(len(df), -1, dtype=np.int8)
+    if 'State' in df.columns:
+        for code, name in enumerate(STATE_NAMES):
+            codes[df['State'].to_numpy() == name] = code
+
+    minutes = np.full(SLOTS, np.nan, dtype=np.float32)
+    states = np.full(SLOTS, -1, dtype=np.int8)
+    keep = (slots >= 0) & (slots < SLOTS)
+    minutes[slots[keep]] = travel[keep]
+    states[slots[keep]] = codes[keep]
+    return day, path.stem.split('_')[0], minutes, states
+
+
+def build_store(source_dir, store_dir=None):
+    """Parse every CSV in source_dir and write the arrays and a manifest to store_dir"""
+    source_dir = Path(source_dir)
+    store_dir = default_store_dir(source_dir) if store_dir is None else Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    paths = sorted(source_dir.glob('*.csv'))
+    rows = [_read_day(path) for path in paths]
+    order = sorted(range(len(rows)), key=lambda i: (rows[i][1], rows[i][0]))  # by route, then date
+    np.save(store_dir / 'minutes.npy', np.array([rows[i][2] for i in order], dtype=np.float32).reshape(-1, SLOTS))
+    np.save(store_dir / 'states.npy', np.array([rows[i][3] for i in order], dtype=np.int8).reshape(-1, SLOTS))
+    np.save(store_dir / 'dates.npy', np.array([rows[i][0] for i in order], dtype='datetime64[D]'))
+    np.save(store_dir / 'routes.npy', np.array([rows[i][1] for i in order], dtype=str))
+    np.save(store_dir / 'files.npy', np.array([paths[i].name for i in order], dtype=str))
+
+    fingerprints = _fingerprints(source_dir)
+    for name, entry in fingerprints.items():
+        entry['sha1'] = file_hash(source_dir / name)
+    manifest = {'version': STORE_VERSION, 'slot_minutes': SLOT_MINUTES, 'files': fingerprints}
+    (store_dir / 'manifest.json').write_text(json.dumps(manifest, indent=1))
+    return store_dir
+
+
+def _is_current(source_dir, store_dir):
+    """True if the manifest matches the CSVs (refreshing stored mtimes of files whose content is unchanged)"""
+    manifest_path = store_dir / 'manifest.json'
+    if not manifest_path.exists():
+        return False
+    manifest = json.loads(manifest_path.read_text())
+    stored = manifest.get('files', {})
+    current = _fingerprints(source_dir)
+    if manifest.get('version') != STORE_VERSION or stored.keys() != current.keys():
+        return False
+    touched = False
+    for name, entry in current.items():
+        if entry['size'] != stored[name]['size']:
+            return False
+        if entry['mtime_ns'] != stored[name]['mtime_ns']:
+            if file_hash(source_dir / name) != stored[name]['sha1']:
+                return False
+            stored[name]['mtime_ns'] = entry['mtime_ns']
+            touched = True
+    if touched:
+        manifest_path.write_text(json.dumps(manifest, indent=1))
+    return True
+
+
+class TravelTimeStore:
+    def __init__(self, store_dir):
+        """Memory-mapped view of a built store (use load_store to build it when needed)"""
+        store_dir = Path(store_dir)
+        self.minutes = np.load(store_dir / 'minutes.npy', mmap_mode='r')
+        self.states = np.load(store_dir / 'states.npy', mmap_mode='r')
+        self.dates = np.load(store_dir / 'dates.npy')
+        self.routes = np.load(store_dir / 'routes.npy')
+        self.files = np.load(store_dir / 'files.npy')
+        self.slot_minutes = np.arange(SLOTS) * SLOT_MINUTES  # minutes after midnight of each slot
+
+    def __len__(self):
+        return len(self.dates)
+
+    def route(self, name):
+        """Row indices of one route, in date order"""
+        return np.flatnonzero(self.routes == name)
+
+    def day(self, date, route=None):
+        """Row index of a date (e.g. '2024-11-01'), optionally for one route"""
+        match = self.dates == np.datetime64(date, 'D')
+        if route is not None:
+            match &= self.routes == route
+        rows = np.flatnonzero(match)
+        if len(rows) == 0:
+            raise KeyError(f"no data for {date}")
+        return rows[0]
+
+    def timestamps(self, row):
+        """datetime64 time of every slot of a row"""
+        return self.dates[row] + self.slot_minutes.astype('timedelta64[m]')
+
+    def state_labels(self, row):
+        """State names of a row ('' where there is none)"""
+        names = np.array(STATE_NAMES + ('',))
+        return names[self.states[row]]  # code -1 picks the trailing ''
+
+
+def load_store(source_dir, store_dir=None):
+    """Store for source_dir, rebuilt first if the CSVs changed since it was built"""
+    store_dir = default_store_dir(source_dir) if store_dir is None else Path(store_dir)
+    if not _is_current(Path(source_dir), store_dir):
+        build_store(source_dir, store_dir)
+    return TravelTimeStore(store_dir)
@@ -32,11 +32,36 @@ def mean_with_errors(n):
     upper = mean + scipy.stats.norm.ppf(0.95) * (var ** 0.5)
     return lower, mean, upper
 
-def plot_clt(sample_sizes, num_samples):
+# batched version of mean_with_errors: draws a (num_samples, n) block of exponentials
+# in chunks of at most max_block numbers, so memory stays bounded for big n.
+# the mean, variance and CI for each replicate all come from the same draws.
+def batch_mean_with_errors(n, num_samples, max_block=2**20, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
+    z_lower, z_upper = scipy.stats.norm.ppf([0.05, 0.95])
+    lower, mean, upper = np.empty(num_samples), np.empty(num_samples), np.empty(num_samples)
+
+    rows = max(1, max_block // n)
+    for start in range(0, num_samples, rows):
+        stop = min(start + rows, num_samples)
+        x = rng.exponential(1, size=(stop - start, n))
+        total = x.sum(axis=1)
+        total_squared = np.einsum('ij,ij->i', x, x)
+        m = total / n
+        var = (n/(n-1))*(total_squared/n-(m*m)) / n
+        mean[start:stop] = m
+        lower[start:stop] = m + z_lower * np.sqrt(var)
+        upper[start:stop] = m + z_upper * np.sqrt(var)
+    return lower, mean, upper
+
+def plot_clt(sample_sizes, num_samples, batched=True):
     for i, size in enumerate(sample_sizes, 1):
         plt.figure(figsize=(8, 6))
-        results = [mean_with_errors(size) for _ in range(num_samples)]
-        means = [r[1] for r in results]
+        if batched:
+            means = batch_mean_with_errors(size, num_samples)[1]
+        else:
+            results = [mean_with_errors(size) for _ in range(num_samples)]
+            means = [r[1] for r in results]
         
         plt.hist(means, bins=30, density=True, alpha=0.7)
         plt.title(f'Distribution of Sample Means (n={size})')
@@ -50,7 +75,10 @@ def plot_clt(sample_sizes, num_samples):
 
     print("\nMean with 90% confidence interval:")
     for size in sample_sizes:
-        lower, mean, upper = mean_with_errors(size)
+        if batched:
+            lower, mean, upper = (v[0] for v in batch_mean_with_errors(size, 1))
+        else:
+            lower, mean, upper = mean_with_errors(size)
         print(f"n={size}: {mean:.4f} ({lower:.4f}, {upper:.4f})")
 
 sample_sizes = [5, 20, 1000]
@@ -6,30 +6,24 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.stats import nbinom
 
-def negative_binomial(r, p):
-    return nbinom.rvs(r, p)
-
-def histo_estimate(nsamples):
-    r, p = 5, 0.5
-    max_trials = 15
-    histo = np.zeros(max_trials)
-    for _ in range(nsamples):
-        rand = negative_binomial(r, p)
-        if rand < max_trials:
-            histo[rand] += 1
-    return histo / nsamples
+# bootstrap estimate of a discrete distribution's histogram: draws all nresamples x nsamples
+# variates from dist (a frozen scipy.stats discrete distribution) in one call, bins every
+# resample with a single bincount, then takes the percentiles of each bin across resamples in one go.
+# returns the (nresamples, nbins) histogram estimates and the (len(percentiles), nbins) bands
+def bootstrap_histogram(dist, nsamples, nresamples, nbins, percentiles=(17, 50, 83), rng=None):
+    draws = dist.rvs(size=(nresamples, nsamples), random_state=rng)
+    in_range = (draws >= 0) & (draws < nbins)
+    # shift each resample into its own block of nbins so one bincount does them all
+    offsets = nbins * np.arange(nresamples)[:, None]
+    counts = np.bincount((draws + offsets)[in_range], minlength=nresamples * nbins)
+    histo_samples = counts.reshape(nresamples, nbins) / nsamples
+    bands = np.percentile(histo_samples, percentiles, axis=0)
+    return histo_samples, bands
 
 nsamples, nresamples = 50, 500
 max_trials = 15
-histo_samples = np.zeros([nresamples, max_trials])
-for i in range(nresamples):
-    histo_samples[i] = histo_estimate(nsamples)
-
-lower, upper, median = np.zeros(max_trials), np.zeros(max_trials), np.zeros(max_trials)
-for i in range(max_trials):
-    median[i] = np.median(histo_samples[:, i])
-    lower[i] = np.percentile(histo_samples[:, i], 17)
-    upper[i] = np.percentile(histo_samples[:, i], 83)
+histo_samples, (lower, median, upper) = bootstrap_histogram(nbinom(5, 0.5), nsamples, nresamples,
+                                                            max_trials, percentiles=(17, 50, 83))
 
 error = (upper - lower) / 2
 
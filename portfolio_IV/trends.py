@@ -4,6 +4,12 @@ This is code for portfolio IV. Here we simulate median stock returns with error
 
 import numpy as np
 import matplotlib.pyplot as plt
+from scipy.stats import norm, qmc
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.running_stats import RunningStats
 
 def stock_simulation(start_price, days, p, mean_change, std_dev_change):
     price = start_price
@@ -16,13 +22,137 @@ def stock_simulation(start_price, days, p, mean_change, std_dev_change):
 def average_stock_price(start_price, days, p_values, simulations, mean_change, std_dev_change):
     averages, errors = [], []
     for p in p_values:
-        results = [stock_simulation(start_price, days, p, mean_change, std_dev_change) for _ in range(simulations)]
-        avg_price = np.mean(results)
-        error = 1.96 * np.std(results, ddof=1) / np.sqrt(simulations)  # 95% confidence interval
+        results = RunningStats()
+        for _ in range(simulations):
+            results.push(stock_simulation(start_price, days, p, mean_change, std_dev_change))
+        avg_price = results.mean
+        error = 1.96 * results.sem()  # 95% confidence interval
         averages.append(avg_price)
         errors.append(error)
     return averages, errors
 
+def simulate_price_paths(start_price, days, p, simulations, mean_change, std_dev_change, log_space=False, rng=None):
+    """
+    Vectorised stock_simulation, every path is simulated at once.
+    p can be a single probability or an array of them, the result has shape
+    p.shape + (simulations, days) and holds the price at the end of each day.
+    log_space=True accumulates log adjustments with cumsum instead of a cumprod (steadier for long horizons).
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    p = np.asarray(p, dtype=float)
+    shape = p.shape + (simulations, days)
+
+    # adjustment = 1 + change on an up day, 1 - change otherwise (done in place to save memory)
+    adjustment = rng.normal(mean_change, std_dev_change, shape)
+    adjustment[rng.random(shape) >= p[..., None, None]] *= -1
+    adjustment += 1
+
+    if log_space:
+        np.log(adjustment, out=adjustment)
+        np.cumsum(adjustment, axis=-1, out=adjustment)
+        np.exp(adjustment, out=adjustment)
+    else:
+        np.cumprod(adjustment, axis=-1, out=adjustment)
+    adjustment *= start_price
+    return adjustment
+
+def stock_price_bands(start_price, days, p_values, simulations, mean_change, std_dev_change,
+                      quantiles=(0.025, 0.5, 0.975), chunk_size=100000, log_space=False, rng=None):
+    """
+    Vectorised average_stock_price that also returns per-day quantile bands of the price.
+    Paths for each p are simulated chunk_size at a time and kept as float32, so 10^6 paths per p fit in memory.
+
+    Returns averages, errors (95% CI half widths, as in average_stock_price) and bands with shape
+    (len(p_values), len(quantiles), days).
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    averages, errors = [], []
+    bands = np.empty((len(p_values), len(quantiles), days))
+    for i, p in enumerate(p_values):
+        paths = np.empty((days, simulations), dtype=np.float32)  # day-major so the quantiles run over contiguous rows
+        final_prices = RunningStats()
+        for start in range(0, simulations, chunk_size):
+            stop = min(start + chunk_size, simulations)
+            chunk = simulate_price_paths(start_price, days, p, stop - start, mean_change, std_dev_change, log_space, rng)
+            paths[:, start:stop] = chunk.T
+            final_prices.push_batch(chunk[:, -1])
+        averages.append(final_prices.mean)
+        errors.append(1.96 * final_prices.sem())  # 95% confidence interval
+        bands[i] = np.quantile(paths, quantiles, axis=1)
+    return averages, errors, bands
+
+def terminal_prices(start_price, u, z, p, mean_change, std_dev_change):
+    """
+    Price after the last day from given inputs: u are uniforms (up day if u < p) and
+    z standard normals for the size of the change, both of shape (simulations, days).
+    Also returns the per-day multipliers.
+    """
+    adjustment = mean_change + std_dev_change * z
+    adjustment[u >= p] *= -1
+    adjustment += 1
+    return start_price * adjustment.prod(axis=-1), adjustment
+
+def variance_reduced_stock_price(start_price, days, p_values, simulations, mean_change, std_dev_change,
+                                 method='antithetic', n_scrambles=16, rng=None):
+    """
+    average_stock_price with a variance reduction method:
+    - 'antithetic': simulations/2 pairs, the second path of each pair uses 1-u and -z
+    - 'control': control variate on the sum of the daily multipliers, whose expectation
+                 is days * (1 + (2p-1) * mean_change)
+    - 'qmc': scrambled Sobol inputs, n_scrambles independent scramblings give the error bar
+             (points per scrambling are rounded up to a power of 2, so at least `simulations` paths)
+
+    Returns averages, errors (95% CI half widths), plain_errors, the variance reduction factor for
+    each p and the number of paths actually used. plain_errors and the factor compare against the
+    plain estimator with the same number of paths, from the same draws, so both modes have the same
+    budget and no extra simulation is needed for the comparison.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    averages, errors, plain_errors, factors = [], [], [], []
+    for p in p_values:
+        if method == 'antithetic':
+            n = simulations // 2
+            u, z = rng.random((n, days)), rng.standard_normal((n, days))
+            y1, _ = terminal_prices(start_price, u, z, p, mean_change, std_dev_change)
+            y2, _ = terminal_prices(start_price, 1 - u, -z, p, mean_change, std_dev_change)
+            pairs = (y1 + y2) / 2
+            avg_price, var = pairs.mean(), pairs.var(ddof=1) / n
+            plain_var = np.concatenate([y1, y2]).var(ddof=1) / (2 * n)
+            n_paths = 2 * n
+        elif method == 'control':
+            u, z = rng.random((simulations, days)), rng.standard_normal((simulations, days))
+            y, adjustment = terminal_prices(start_price, u, z, p, mean_change, std_dev_change)
+            control = adjustment.sum(axis=-1)
+            expected_control = days * (1 + (2 * p - 1) * mean_change)
+            beta = np.cov(y, control)[0, 1] / control.var(ddof=1)
+            adjusted = y - beta * (control - expected_control)
+            avg_price, var = adjusted.mean(), adjusted.var(ddof=1) / simulations
+            plain_var = y.var(ddof=1) / simulations
+            n_paths = simulations
+        elif method == 'qmc':
+            m = max(1, int(np.ceil(np.log2(simulations / n_scrambles))))
+            replicate_means, ys = [], []
+            for _ in range(n_scrambles):
+                x = qmc.Sobol(d=2 * days, scramble=True, seed=rng).random_base2(m)
+                x = np.clip(x, 1e-12, 1 - 1e-12)  # keep norm.ppf finite
+                y, _ = terminal_prices(start_price, x[:, :days], norm.ppf(x[:, days:]), p, mean_change, std_dev_change)
+                replicate_means.append(y.mean())
+                ys.append(y)
+            ys = np.concatenate(ys)
+            avg_price, var = np.mean(replicate_means), np.var(replicate_means, ddof=1) / n_scrambles
+            plain_var = ys.var(ddof=1) / len(ys)
+            n_paths = len(ys)
+        else:
+            raise ValueError(f"unknown variance reduction method: {method}")
+        averages.append(avg_price)
+        errors.append(1.96 * np.sqrt(var))  # 95% confidence interval
+        plain_errors.append(1.96 * np.sqrt(plain_var))
+        factors.append(plain_var / var)
+    return averages, errors, plain_errors, factors, n_paths
+
 # Parameters
 start_price = 100
 days = 30
@@ -32,7 +162,7 @@ mean_change = 0.1
 std_dev_change = 0.05
 
 # Calculate average stock prices and errors
-averages, errors = average_stock_price(start_price, days, p_values, simulations, mean_change, std_dev_change)
+averages, errors, bands = stock_price_bands(start_price, days, p_values, simulations, mean_change, std_dev_change)
 
 # Plot the graph
 plt.errorbar(p_values, averages, yerr=errors, fmt='ko')
@@ -41,4 +171,27 @@ plt.ylabel('Average Stock Price After 30 Days')
 plt.title('Stock Price Simulation with Variable Percentage Changes')
 plt.grid(True)
 plt.savefig('portfolio_IV/figure_2.png')
-plt.show()
\ No newline at end of file
+plt.show()
+
+# Per-day 95% band and median of the price for each p, from the same paths
+plt.figure()
+day_numbers = np.arange(1, days + 1)
+for p, (lower, median, upper) in zip(p_values, bands):
+    line, = plt.plot(day_numbers, median, label=f'p={p}')
+    plt.fill_between(day_numbers, lower, upper, color=line.get_color(), alpha=0.15)
+plt.xlabel('Day')
+plt.ylabel('Stock Price (median and 95% band)')
+plt.title('Spread of Simulated Price Paths')
+plt.yscale('log')
+plt.grid(True)
+plt.legend()
+plt.savefig('portfolio_IV/figure_3.png')
+plt.show()
+
+# Compare each variance reduction method with plain Monte Carlo on the same number of paths
+for method in ['antithetic', 'control', 'qmc']:
+    _, vr_errors, plain_errors, factors, n_paths = variance_reduced_stock_price(
+        start_price, days, p_values, simulations, mean_change, std_dev_change, method=method)
+    print(f"\n{method} ({n_paths} paths):")
+    for p, error, plain_error, factor in zip(p_values, vr_errors, plain_errors, factors):
+        print(f"p={p}: ±{error:.3f} (plain ±{plain_error:.3f}), variance reduction factor {factor:.2f}")
\ No newline at end of file
@@ -1,9 +1,20 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy import stats
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.fluid import approximate_queue
+from common.intensity import GaussianPeakIntensity
+from common.lindley import lindley_queue, number_in_system
+from common.multiserver import MultiServerQueue
+from common.running_stats import RunningStats
+from common.transient import transient_queue
+from thinning import PiecewiseEnvelope
 
 class TimeVaryingPollingQueue:
-    def __init__(self, base_rate=10, service_rate=15, capacity=None):
+    def __init__(self, base_rate=10, service_rate=15, capacity=None, peaks=None, rng=None):
         """
         Time-Varying Polling Station Queue Simulator
 
@@ -11,17 +22,24 @@ class TimeVaryingPollingQueue:
         - base_rate: background arrival rate (per hour)
         - service_rate: service rate (per hour)
         - capacity: maximum queue capacity (optional)
+        - peaks: peak periods, list of {"amplitude", "time", "width"} (optional, times in hours)
+        - rng: numpy Generator, or a seed / SeedSequence to build one (optional)
         """
         self.base_rate = base_rate
         self.service_rate = service_rate
         self.capacity = capacity
+        self.rng = np.random.default_rng(rng)
 
         # Define peak periods (times in hours)
-        self.peaks = [
-            {"amplitude": 30, "time": 9, "width": 1.5},    # Morning peak at 9 AM
-            {"amplitude": 20, "time": 12, "width": 2},     # Lunch peak at 12 PM
-            {"amplitude": 25, "time": 16.5, "width": 1.5}, # Afternoon peak at 4:30 PM
-        ]
+        if peaks is None:
+            peaks = [
+                {"amplitude": 30, "time": 9, "width": 1.5},    # Morning peak at 9 AM
+                {"amplitude": 20, "time": 12, "width": 2},     # Lunch peak at 12 PM
+                {"amplitude": 25, "time": 16.5, "width": 1.5}, # Afternoon peak at 4:30 PM
+            ]
+        self.peaks = peaks
+        # lambda(t) built from the peaks above, evaluates on arrays in one go
+        self.intensity = GaussianPeakIntensity(self.base_rate, self.peaks)
 
         # Current state
         self.queue_length = 0
@@ -36,56 +54,76 @@ class TimeVaryingPollingQueue:
         self.total_voters = 0
         self.rejected_voters = 0
 
-        # Compute M, the maximum of lambda(t)
-        self.M = self.compute_max_arrival_rate()
+        # Piecewise-constant thinning envelopes, one per (peaks, duration) configuration
+        self._envelopes = {}
+        self.thinning_candidates = 0
+
+    def arrival_envelope(self, end_time, bin_width=0.25):
+        """Piecewise-constant majorant of arrival_rate on [0, end_time] (bins of bin_width hours), cached"""
+        key = (self.intensity, end_time, bin_width)
+        if key not in self._envelopes:
+            edges = np.append(np.arange(0, end_time, bin_width), end_time)
+            self._envelopes[key] = PiecewiseEnvelope(edges, self.intensity.bound(edges[:-1], edges[1:]))
+        return self._envelopes[key]
 
-    def compute_max_arrival_rate(self):
-        """Compute maximum of arrival_rate(t) over the duration"""
-        # Compute over fine-grained time points to find maximum
-        t_values = np.linspace(0, 24, 1000)
-        rates = [self.arrival_rate(t) for t in t_values]
-        M = max(rates)
-        return M * 1.1  # Add small buffer to ensure M ≥ lambda(t) for all t
+    def generate_arrivals(self, duration_hours, rng=None):
+        """
+        Whole arrival stream for [0, duration_hours) in one vectorised pass: candidates from the
+        piecewise envelope, thinned with one batch of uniforms. Cost is O(accepted arrivals).
+        """
+        if rng is None:
+            rng = self.rng
+        envelope = self.arrival_envelope(duration_hours)
+        candidates, bounds = envelope.sample(0, duration_hours, rng)
+        self.thinning_candidates += len(candidates)
+        accept = rng.random(len(candidates)) * bounds <= self.arrival_rate(candidates)
+        return candidates[accept]
 
     def arrival_rate(self, t):
         """
         Calculate arrival rate at time t
-        t: time in hours
+        t: time in hours (scalar or array)
         """
-        rate = self.base_rate
-        for peak in self.peaks:
-            A = peak["amplitude"]
-            t_peak = peak["time"]
-            sigma = peak["width"]
-            rate += A * np.exp(-((t - t_peak)**2) / (2 * sigma**2))
-        return rate
+        return self.intensity(t)
 
     def generate_next_arrival_time(self, current_time):
         """
-        Generate the next arrival time using thinning algorithm
+        Generate the next arrival time using thinning algorithm,
+        with candidates from the piecewise-constant envelope instead of the single bound M
         """
+        envelope = self.arrival_envelope(self.simulation_end_time)
         t = current_time
         while True:
-            # Generate S ~ Exponential(M)
-            S = np.random.exponential(scale=1 / self.M)
-            t_candidate = t + S
-            if t_candidate >= self.simulation_end_time:
+            t_candidate = envelope.next_candidate(t, self.simulation_end_time, self.rng)
+            if t_candidate is None:
                 return None  # No more arrivals within the simulation time
+            self.thinning_candidates += 1
             # Acceptance probability
-            U = np.random.uniform(0, 1)
+            U = self.rng.uniform(0, 1)
             lambda_t_candidate = self.arrival_rate(t_candidate)
-            if U <= lambda_t_candidate / self.M:
+            if U <= lambda_t_candidate / envelope.rate(t_candidate):
                 return t_candidate
             else:
                 t = t_candidate  # Continue to next candidate time
 
     def generate_service_time(self):
         """Generate a service time"""
-        return np.random.exponential(scale=1 / self.service_rate)
+        return self.rng.exponential(scale=1 / self.service_rate)
+
+    def run_simulation(self, duration_hours=12, batch_arrivals=False):
+        """
+        Run the simulation for specified hours
 
-    def run_simulation(self, duration_hours=12):
-        """Run the simulation for specified hours"""
+        batch_arrivals=True generates the whole day's arrivals up front with generate_arrivals
+        instead of thinning one arrival at a time
+        """
         self.simulation_end_time = duration_hours  # in hours
+        self.thinning_candidates = 0
+        if batch_arrivals:
+            arrivals = iter(self.generate_arrivals(duration_hours))
+            next_arrival_time = lambda t: next(arrivals, None)
+        else:
+            next_arrival_time = self.generate_next_arrival_time
         t = 0  # current time in hours
         queue_length = 0
         self.queue_history = []
@@ -96,7 +134,7 @@ class TimeVaryingPollingQueue:
 
         # Initialize event times
         # Generate first arrival time
-        t_arrival = self.generate_next_arrival_time(t)
+        t_arrival = next_arrival_time(t)
         # No departure scheduled initially
         t_departure = np.inf
 
@@ -124,7 +162,7 @@ class TimeVaryingPollingQueue:
                     self.rejected_voters += 1
 
                 # Generate next arrival time
-                t_arrival = self.generate_next_arrival_time(t)
+                t_arrival = next_arrival_time(t)
             else:
                 # Next event is a departure
                 t = t_departure
@@ -143,24 +181,94 @@ class TimeVaryingPollingQueue:
                     # Queue empty
                     t_departure = np.inf
 
+    def run_lindley_simulation(self, duration_hours=12):
+        """
+        Batch solver version of run_simulation: draws the whole day's arrivals and service times
+        up front and gets departures from the Lindley recursion (common/lindley.py) instead of
+        processing one event per loop iteration. Fills the same histories and statistics.
+        Also stores the waiting time (before service) of each admitted voter in self.waiting_times.
+        """
+        self.simulation_end_time = duration_hours  # in hours
+        self.thinning_candidates = 0
+        arrivals = self.generate_arrivals(duration_hours)
+        service_times = self.rng.exponential(scale=1 / self.service_rate, size=len(arrivals))
+        solution = lindley_queue(arrivals, service_times, self.capacity)
+
+        admitted = solution['admitted']
+        departures = solution['departures'][admitted]
+        self.total_voters = int(admitted.sum())
+        self.rejected_voters = int((~admitted).sum())
+        self.waiting_times = solution['waits'][admitted]
+
+        # one record per event (every arrival, admitted or not, and every departure),
+        # holding the queue length just before the event as in run_simulation
+        event_times = np.sort(np.concatenate([arrivals, departures]))
+        self.time_history = event_times.tolist()
+        self.queue_history = number_in_system(arrivals[admitted], departures, event_times, side='left').tolist()
+        self.arrival_rate_history = self.arrival_rate(event_times).tolist()
+
+    def approximate_queue_length(self, t, method='combined', servers=1):
+        """
+        Mean number of voters in the station at times t (hours) from the fluid / pointwise
+        stationary approximations (common/fluid.py), no simulation needed
+        """
+        return approximate_queue(self.arrival_rate, lambda t: self.service_rate, t, method=method,
+                                 servers=servers, capacity=self.capacity)
+
+    def exact_distribution(self, t, servers=1, **kwargs):
+        """
+        Exact P(queue = k, t), blocking probability and expected number of rejected voters at times
+        t (hours) for a finite capacity, by uniformization (common/transient.py), no sampling noise
+        """
+        if self.capacity is None:
+            raise ValueError("the exact solver needs a finite capacity")
+        return transient_queue(self.arrival_rate, lambda t: self.service_rate, self.capacity, t,
+                               servers=servers, **kwargs)
+
     def run_multiple_simulations(self, n_simulations=30, duration_hours=24):
-        avg_queue_lengths = []
+        avg_queue_lengths = RunningStats()
         
         for i in range(n_simulations):
             print(f"Running simulation {i+1}/{n_simulations}")
             self.run_simulation(duration_hours)
-            avg_queue_lengths.append(np.mean(self.queue_history))
+            avg_queue_lengths.push(np.mean(self.queue_history))
         
         # Calculate mean and 95% confidence interval
-        mean = np.mean(avg_queue_lengths)
-        std_err = stats.sem(avg_queue_lengths)
-        ci = stats.t.interval(confidence=0.95,  # Changed from alpha to confidence
-                            df=len(avg_queue_lengths)-1,
-                            loc=mean,
-                            scale=std_err)
+        mean = avg_queue_lengths.mean
+        ci = avg_queue_lengths.confidence_interval(confidence=0.95)
         return mean, ci[0], ci[1]
 
+    def run_parallel_simulations(self, n_simulations=30, duration_hours=24, seed=None, workers=None):
+        """
+        Same estimate as run_multiple_simulations, with the replications spread over a process pool.
 
+        Replication i gets its own random stream, child i of SeedSequence(seed).spawn, and only its
+        summary comes back to the parent. Summaries are combined in replication order, so a given
+        seed gives identical results for any number of workers (workers=1 runs in this process).
+        Does not change the state of this simulator.
+        """
+        children = np.random.SeedSequence(seed).spawn(n_simulations)
+        config = (type(self), self.replica_kwargs(), duration_hours)
+        jobs = [(config, child) for child in children]
+        if workers == 1:
+            summaries = [_run_replication(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                summaries = list(pool.map(_run_replication, jobs, chunksize=max(1, n_simulations // 64)))
+
+        avg_queue_lengths = RunningStats()
+        for summary in summaries:
+            avg_queue_lengths.push(summary['average_queue_length'])
+        mean = avg_queue_lengths.mean
+        ci = avg_queue_lengths.confidence_interval(confidence=0.95)
+        return mean, ci[0], ci[1]
+
+
+
+    def replica_kwargs(self):
+        """Constructor arguments that rebuild this simulator in a worker process"""
+        return {'base_rate': self.base_rate, 'service_rate': self.service_rate,
+                'capacity': self.capacity, 'peaks': self.peaks}
 
     def plot_results(self):
         """Visualize the queue length and arrival rate over time"""
@@ -176,7 +284,7 @@ class TimeVaryingPollingQueue:
 
         # Plot arrival rate
         time_continuous = np.linspace(0, self.simulation_end_time, 1000)
-        arrival_rates = [self.arrival_rate(t) for t in time_continuous]
+        arrival_rates = self.arrival_rate(time_continuous)
         ax2.plot(time_continuous, arrival_rates, 'r-', label='Arrival Rate')
         ax2.set_xlabel('Time (hours)')
         ax2.set_ylabel('Arrival Rate (voters/hour)')
@@ -191,17 +299,88 @@ class TimeVaryingPollingQueue:
         print("\nSimulation Results:")
         print(f"Total Voters Served: {self.total_voters}")
         print(f"Rejected Voters: {self.rejected_voters}")
-        print(f"Average Queue Length: {np.mean(self.queue_history):.1f}")
-        print(f"Maximum Queue Length: {max(self.queue_history)}")
-        print(f"Average Arrival Rate: {np.mean(self.arrival_rate_history):.1f} voters/hour")
+        if self.queue_history:  # empty when nobody arrived
+            print(f"Average Queue Length: {np.mean(self.queue_history):.1f}")
+            print(f"Maximum Queue Length: {max(self.queue_history)}")
+            print(f"Average Arrival Rate: {np.mean(self.arrival_rate_history):.1f} voters/hour")
+        if self.thinning_candidates:
+            print(f"Thinning Acceptance Rate: {(self.total_voters + self.rejected_voters) / self.thinning_candidates:.2f}")
+        else:
+            print("Thinning Acceptance Rate: n/a (no candidates)")
+
+class MultiBoothPollingQueue(TimeVaryingPollingQueue):
+    def __init__(self, base_rate=10, service_rate=15, capacity=None, peaks=None, booths=2, rng=None):
+        """
+        M(t)/M/c version of TimeVaryingPollingQueue: `booths` voting booths share one line.
+        service_rate is per booth and capacity counts everyone in the station (waiting or voting).
+        The events go through the heap event calendar (common/event_calendar.py).
+        """
+        super().__init__(base_rate, service_rate, capacity, peaks=peaks, rng=rng)
+        self.booths = booths
+
+    def replica_kwargs(self):
+        return {**super().replica_kwargs(), 'booths': self.booths}
+
+    def approximate_queue_length(self, t, method='combined', servers=None):
+        return super().approximate_queue_length(t, method, self.booths if servers is None else servers)
+
+    def exact_distribution(self, t, servers=None, **kwargs):
+        return super().exact_distribution(t, self.booths if servers is None else servers, **kwargs)
+
+    def run_simulation(self, duration_hours=12, batch_arrivals=False):
+        """Same as TimeVaryingPollingQueue.run_simulation (same histories and statistics) with c booths"""
+        self.simulation_end_time = duration_hours  # in hours
+        self.thinning_candidates = 0
+        if batch_arrivals:
+            arrivals = iter(self.generate_arrivals(duration_hours))
+            next_arrival_time = lambda t: next(arrivals, None)
+        else:
+            next_arrival_time = self.generate_next_arrival_time
+        self.queue_history = []
+        self.time_history = []
+
+        queue = MultiServerQueue(next_arrival_time, lambda t: self.generate_service_time(),
+                                 servers=self.booths, capacity=self.capacity)
+
+        def record(t):
+            # number in the station just before each event, as in the single booth version
+            self.queue_history.append(queue.number_in_system)
+            self.time_history.append(t)
+
+        queue.run(before_event=record)  # until the last voter has left
+        self.arrival_rate_history = self.arrival_rate(np.array(self.time_history)).tolist()
+        self.total_voters = queue.arrivals
+        self.rejected_voters = queue.rejected
+        self.waiting_times = np.frombuffer(queue.waiting_times, dtype=np.float64).copy()
+
+    def run_lindley_simulation(self, duration_hours=12):
+        """
+        The Lindley recursion only covers a single booth, so with c booths this draws the whole
+        day's arrivals up front like the single booth version and runs them through the event
+        calendar (run_simulation with batch_arrivals=True). Fills the same histories, statistics
+        and waiting times.
+        """
+        self.run_simulation(duration_hours, batch_arrivals=True)
+
+def _run_replication(job):
+    """One replication for run_parallel_simulations, returns a summary instead of the histories"""
+    (cls, kwargs, duration_hours), seed = job
+    sim = cls(**kwargs, rng=seed)
+    sim.run_simulation(duration_hours)
+    return {
+        'average_queue_length': np.mean(sim.queue_history),
+        'max_queue_length': max(sim.queue_history),
+        'total_voters': sim.total_voters,
+        'rejected_voters': sim.rejected_voters,
+    }
 
 # Modify the main block to use multiple simulations
 if __name__ == "__main__":
     sim = TimeVaryingPollingQueue(base_rate=5, service_rate=25, capacity=20)
     
     # Run multiple simulations and get confidence interval
-    mean_ql, ci_lower, ci_upper = sim.run_multiple_simulations(n_simulations=30, 
-                                                             duration_hours=24)
+    mean_ql, ci_lower, ci_upper = sim.run_parallel_simulations(n_simulations=30,
+                                                               duration_hours=24)
     
     # Run one final simulation for plotting
     sim.run_simulation(duration_hours=24)
@@ -211,3 +390,14 @@ if __name__ == "__main__":
     print("\nConfidence Interval Analysis:")
     print(f"Average Queue Length: {mean_ql:.1f} ± {(ci_upper-ci_lower)/2:.1f}")
     print(f"95% CI: [{ci_lower:.1f}, {ci_upper:.1f}]")
+
+    # Exact distribution over the day (finite capacity, so no simulation needed)
+    exact = sim.exact_distribution(np.linspace(0, 24, 24 * 12 + 1), max_step=1 / 60)
+    print(f"Expected Rejected Voters (exact): {exact['expected_rejected'][-1]:.1f}")
+    print(f"Peak Blocking Probability (exact): {exact['blocking'].max():.2f}")
+
+    # Same day with a second booth sharing the line (M(t)/M/2)
+    two_booths = MultiBoothPollingQueue(base_rate=5, service_rate=25, capacity=20, booths=2)
+    mean_2, ci_lower_2, ci_upper_2 = two_booths.run_parallel_simulations(n_simulations=30,
+                                                                         duration_hours=24)
+    print(f"Average Queue Length with 2 booths: {mean_2:.1f} ± {(ci_upper_2-ci_lower_2)/2:.1f}")
@@ -0,0 +1,58 @@
+"""
+Piecewise-constant majorant for thinning a non-homogeneous Poisson process.
+
+Instead of one global bound M = max lambda(t), the day is split into bins and each bin gets its
+own bound, so off-peak candidates are accepted almost as often as peak ones.
+"""
+
+import numpy as np
+
+
+class PiecewiseEnvelope:
+    def __init__(self, edges, rates):
+        """
+        Parameters:
+        - edges: bin edges (increasing), length n_bins + 1
+        - rates: upper bound of lambda(t) on each bin, length n_bins
+        """
+        self.edges = np.asarray(edges, dtype=float)
+        self.rates = np.asarray(rates, dtype=float)
+        if len(self.edges) != len(self.rates) + 1:
+            raise ValueError("need one rate per bin")
+
+    def rate(self, t):
+        """Envelope value at time(s) t"""
+        k = np.clip(np.searchsorted(self.edges, t, side='right') - 1, 0, len(self.rates) - 1)
+        return self.rates[k]
+
+    def next_candidate(self, t, end_time, rng):
+        """
+        Next candidate event time after t for a Poisson process with the envelope rate,
+        or None if it falls after end_time. Uses the integrated rate, one Exp(1) per candidate.
+        """
+        hazard = rng.exponential(1)
+        k = max(np.searchsorted(self.edges, t, side='right') - 1, 0)
+        while k < len(self.rates):
+            bin_end = min(self.edges[k + 1], end_time)
+            in_bin = self.rates[k] * (bin_end - t)
+            if hazard < in_bin:
+                return t + hazard / self.rates[k]
+            hazard -= in_bin
+            t = bin_end
+            if t >= end_time:
+                return None
+            k += 1
+        return None
+
+    def sample(self, start_time, end_time, rng):
+        """
+        All candidate times in [start_time, end_time) at once: a Poisson count per bin, then
+        uniform positions inside each bin. Returns sorted times and the envelope rate at each.
+        """
+        lo = np.clip(self.edges[:-1], start_time, end_time)
+        hi = np.clip(self.edges[1:], start_time, end_time)
+        counts = rng.poisson(self.rates * (hi - lo))
+        bins = np.repeat(np.arange(len(self.rates)), counts)
+        times = lo[bins] + rng.random(len(bins)) * (hi - lo)[bins]
+        order = np.argsort(times)
+        return times[order], self.rates[bins][order]
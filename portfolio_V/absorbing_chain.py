@@ -0,0 +1,96 @@
+"""
+Absorbing Markov chain solver for portfolio V.
+
+Works on dense, sparse (CSR) or tridiagonal transition matrices and never forms the fundamental
+matrix N = (I - Q)^-1. Every quantity is a linear solve against I - Q, done with a banded solver
+when Q is tridiagonal (e.g. gambler's ruin / birth-death chains) and a sparse LU otherwise, so
+chains with 10^5 - 10^6 states are fine.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.linalg import solve_banded
+from scipy.sparse.linalg import splu
+
+
+class AbsorbingChain:
+    def __init__(self, P, absorbing=None):
+        """
+        Parameters:
+        - P: transition matrix, numpy array or scipy.sparse matrix
+        - absorbing: indices of the absorbing states (optional, by default every state with P[i, i] == 1)
+        """
+        self.P = sp.csr_matrix(P, dtype=float)
+        self.n_states = self.P.shape[0]
+
+        if absorbing is None:
+            absorbing = np.flatnonzero(self.P.diagonal() == 1)
+        self.absorbing = np.unique(np.asarray(absorbing, dtype=int))
+        if len(self.absorbing) == 0:
+            raise ValueError("chain has no absorbing states")
+        self.transient = np.setdiff1d(np.arange(self.n_states), self.absorbing)
+
+        # Q: transient -> transient, R: transient -> absorbing
+        rows = self.P[self.transient]
+        self.Q = rows[:, self.transient]
+        self.R = rows[:, self.absorbing]
+
+        # factorise I - Q once, reused by every solve
+        A = (sp.identity(len(self.transient), format='csr') - self.Q).tocsc()
+        offsets = A.tocoo()
+        if np.all(np.abs(offsets.col - offsets.row) <= 1):
+            # tridiagonal, use the O(n) banded solver
+            self._banded = np.zeros((3, A.shape[0]))
+            self._banded[0, 1:] = A.diagonal(1)
+            self._banded[1] = A.diagonal()
+            self._banded[2, :-1] = A.diagonal(-1)
+            self._lu = None
+        else:
+            self._banded = None
+            self._lu = splu(A)
+
+    @classmethod
+    def from_tridiagonal(cls, lower, diag, upper, absorbing=None):
+        """
+        Build a chain from its three diagonals: lower[i] = P[i+1, i], diag[i] = P[i, i], upper[i] = P[i, i+1]
+        """
+        P = sp.diags([lower, diag, upper], offsets=[-1, 0, 1], format='csr')
+        return cls(P, absorbing)
+
+    def solve(self, rhs):
+        """Solve (I - Q) x = rhs, i.e. x = N @ rhs. rhs can have one column per right hand side."""
+        rhs = np.asarray(rhs, dtype=float)
+        if self._banded is not None:
+            return solve_banded((1, 1), self._banded, rhs)
+        return self._lu.solve(rhs)
+
+    def hitting_probabilities(self, targets):
+        """
+        Probability of being absorbed in each target state, starting from every state.
+
+        targets can be a single absorbing state (returns a vector of length n_states) or a list
+        of them (returns an (n_states, len(targets)) array, solved in one batch).
+        """
+        single = np.ndim(targets) == 0
+        targets = np.atleast_1d(targets)
+        if not np.all(np.isin(targets, self.absorbing)):
+            raise ValueError("hitting probabilities are only available for absorbing target states")
+        columns = np.searchsorted(self.absorbing, targets)
+
+        probs = np.zeros((self.n_states, len(targets)))
+        probs[self.transient] = self.solve(self.R[:, columns].toarray()).reshape(len(self.transient), -1)
+        probs[targets, np.arange(len(targets))] = 1
+        return probs[:, 0] if single else probs
+
+    def expected_absorption_times(self):
+        """Expected number of steps until absorption from every state (t = N 1)"""
+        times = np.zeros(self.n_states)
+        times[self.transient] = self.solve(np.ones(len(self.transient)))
+        return times
+
+    def absorption_time_variances(self):
+        """Variance of the number of steps until absorption, (2N - I) t - t^2"""
+        t = self.solve(np.ones(len(self.transient)))
+        variances = np.zeros(self.n_states)
+        variances[self.transient] = 2 * self.solve(t) - t - t ** 2
+        return variances
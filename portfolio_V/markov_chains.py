@@ -5,6 +5,7 @@ This is code for portfolio V. Here we simulate a chronic gambler who has a dream
 
 import numpy as np
 import matplotlib.pyplot as plt
+from absorbing_chain import AbsorbingChain
 
 # transition matrix P
 P = np.array([
@@ -22,21 +23,10 @@ P = np.array([
     [0,   0,   0,   0,   0,   0,   0,   0,   0,   0,   0,   1  ]   # State 11 (winning state)
 ])
 
-# extract Q (transitions between non-absorbing states)
-Q = P[1:11, 1:11]  # Exclude states 0 and 11 (absorbing states)
-
-# extract R (transitions to the winning state)
-R = P[1:11, 11]
-
-# calculate the fundamental matrix
-I = np.eye(Q.shape[0])
-N = np.linalg.inv(I - Q)
-
-# Calculate hitting probabilities to the winning state (state 11)
-hitting_probs = N @ R
-
-# Add probabilities for absorbing states
-hitting_probs = np.concatenate(([0], hitting_probs, [1]))
+# states 0 (ruin) and 11 (winning) are absorbing, picked up from P[i, i] == 1.
+# hitting probabilities to the winning state come from a banded solve of (I - Q) h = R
+chain = AbsorbingChain(P)
+hitting_probs = chain.hitting_probabilities(11)
 
 # Define all states (0 to 11) with corresponding dollar amounts
 states = range(12)
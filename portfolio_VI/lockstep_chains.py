@@ -0,0 +1,106 @@
+"""
+Simulates many independent copies of a Markov chain together.
+
+The lookup tables are built once from the transition matrix, then every step advances all chains
+with one vectorised lookup instead of walking trans[start] in a Python loop per chain.
+"""
+
+import numpy as np
+
+
+class ChainSampler:
+    def __init__(self, trans, method='auto'):
+        """
+        Parameters:
+        - trans: (n_states, n_states) transition matrix
+        - method: 'cumulative' (searchsorted on the cumulative rows, O(log n) per step),
+                  'alias' (Walker/Vose alias tables, O(1) per step, better for wide rows)
+                  or 'auto' (alias when there are more than 32 states)
+        """
+        self.trans = np.asarray(trans, dtype=float)
+        self.n_states = self.trans.shape[0]
+        if method == 'auto':
+            method = 'alias' if self.n_states > 32 else 'cumulative'
+        if method not in ('cumulative', 'alias'):
+            raise ValueError(f"unknown method: {method}")
+        self.method = method
+
+        if method == 'cumulative':
+            cumulative = np.cumsum(self.trans, axis=1)
+            cumulative[:, -1] = 1  # guard against rounding in the row sums
+            # shift row i up by i so the whole table is one sorted array, then
+            # a single searchsorted of (state + u) finds the next state of every chain
+            self._flat = (cumulative + np.arange(self.n_states)[:, None]).ravel()
+        else:
+            self._prob, self._alias = self._build_alias_tables(self.trans)
+
+    @staticmethod
+    def _build_alias_tables(trans):
+        """
+        Vose's alias method, one table per row, all rows at once: each row keeps a stack of its
+        small (scaled prob < 1) and large columns, and every pass pairs the top small column with
+        the top large one in every row that still has both. At most n passes of O(n) array work.
+        """
+        n = trans.shape[0]
+        rows = np.arange(n)
+        prob = np.ones((n, n))
+        alias = np.tile(rows, (n, 1))
+        scaled = trans * n / trans.sum(axis=1, keepdims=True)
+
+        # stacks of column indices in ascending order (the top is the last filled slot)
+        is_small = scaled < 1
+        small_stack = np.argsort(~is_small, axis=1, kind='stable')
+        large_stack = np.argsort(is_small, axis=1, kind='stable')
+        small_top = is_small.sum(axis=1)
+        large_top = n - small_top
+
+        while True:
+            active = rows[(small_top > 0) & (large_top > 0)]
+            if len(active) == 0:
+                break
+            small_top[active] -= 1
+            large_top[active] -= 1
+            s = small_stack[active, small_top[active]]
+            l = large_stack[active, large_top[active]]
+            prob[active, s] = scaled[active, s]
+            alias[active, s] = l
+            scaled[active, l] -= 1 - scaled[active, s]
+
+            # the large column goes back on the small or the large stack
+            to_small = scaled[active, l] < 1
+            for stack, top, push in ((small_stack, small_top, to_small), (large_stack, large_top, ~to_small)):
+                pushed = active[push]
+                stack[pushed, top[pushed]] = l[push]
+                top[pushed] += 1
+        # whatever is left keeps probability 1 (exact up to rounding)
+        return prob, alias
+
+    def step(self, states, rng):
+        """Advance every chain in states (array of current states) by one step"""
+        if self.method == 'cumulative':
+            u = 1 - rng.random(len(states))  # in (0, 1], next state is the first one with u <= cumulative prob
+            next_states = np.searchsorted(self._flat, states + u) - states * self.n_states
+            return np.clip(next_states, 0, self.n_states - 1)  # only matters if states + u rounds to states
+        column = rng.integers(0, self.n_states, len(states))
+        keep = rng.random(len(states)) < self._prob[states, column]
+        return np.where(keep, column, self._alias[states, column])
+
+
+def simulate_chains(trans, n_chains, steps, initial_state=0, method='auto', rng=None):
+    """
+    Runs n_chains independent chains in lockstep for the
+    given number of steps and returns each chain's fraction of time in each state,
+    shape (n_chains, n_states). Each row is one block average.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    sampler = ChainSampler(trans, method)
+    states = np.full(n_chains, initial_state, dtype=np.int64)
+    chain_index = np.arange(n_chains)
+    state_visits = np.zeros((n_chains, sampler.n_states), dtype=np.int64)
+
+    for _ in range(steps):
+        state_visits[chain_index, states] += 1  # one entry per chain, so no repeated indices
+        states = sampler.step(states, rng)
+
+    return state_visits / steps
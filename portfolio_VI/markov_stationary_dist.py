@@ -1,5 +1,12 @@
 import numpy as np
 import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.running_stats import RunningStats
+from lockstep_chains import simulate_chains
+from stationary import stationary_distribution, spectral_gap
 
 # transition matrix 
 transition_matrix = np.array([
@@ -8,41 +15,18 @@ transition_matrix = np.array([
     [0.7, 0.0, 0.3]   # R to G, Y, R
 ])
 
-# function to simulate Markov chain
-def simulate_markov_chain(trans, steps, initial_state=0):
-    num_states = trans.shape[0]
-    current_state = initial_state
-    state_visits = np.zeros(num_states)
-
-    for i in range(steps):
-        state_visits[current_state] += 1
-        current_state = markov_move(trans, current_state)
-
-    return state_visits / steps
-
-# markov move function
-def markov_move(trans, start):
-    myrand = np.random.uniform(0, 1)
-    accum = 0
-    for next_state, prob in enumerate(trans[start]):
-        accum += prob
-        if myrand <= accum:
-            return next_state
-
 # params to simulate
 steps = 10000
 block_size = 100
 n_blocks = steps // block_size
 
-# do block averaging
-block_averages = np.array([
-    simulate_markov_chain(transition_matrix, block_size)
-    for i in range(n_blocks)
-])
+# do block averaging, each block is one of n_blocks chains run together in lockstep
+block_averages = RunningStats(shape=transition_matrix.shape[0])
+block_averages.push_batch(simulate_chains(transition_matrix, n_blocks, block_size))
 
 # calc mean and variance of block averages
-mean_distribution = np.mean(block_averages, axis=0)
-variance_distribution = np.var(block_averages, axis=0, ddof=1)
+mean_distribution = block_averages.mean
+variance_distribution = block_averages.variance(ddof=1)
 
 # ploptting
 plt.figure(figsize=(6, 4))
@@ -70,4 +54,10 @@ with open('./portfolio_VI/table1.txt', 'w') as f:
     f.write(f"{'State':<5} {'Mean Probability':<20} {'Standard Error':<20} {'95% Confidence Interval':<30}\n")
     for i, state in enumerate(states):
         ci_low, ci_high = confidence_intervals[:, i]
-        f.write(f"{state:<5} {mean_distribution[i]:<15.4f} {standard_error[i]:<15.4f} [{ci_low:.4f}, {ci_high:.4f}]\n")
\ No newline at end of file
+        f.write(f"{state:<5} {mean_distribution[i]:<15.4f} {standard_error[i]:<15.4f} [{ci_low:.4f}, {ci_high:.4f}]\n")
+
+# compare against the exact stationary distribution
+exact_distribution = stationary_distribution(transition_matrix)
+gap, relaxation_time = spectral_gap(transition_matrix)
+print(f"Exact stationary distribution: {dict(zip(states, np.round(exact_distribution, 4).tolist()))}")
+print(f"Spectral gap: {gap:.4f} (relaxation time ~{relaxation_time:.1f} steps, block size {block_size})")
@@ -0,0 +1,94 @@
+"""
+Exact stationary distribution of a Markov chain, to check (or replace) the block averaging estimate.
+
+Small chains are solved directly. Large sparse chains use a Krylov eigen-solver, with power iteration
+as the fallback; both can be warm started from a previous solution when the matrix only changes slightly.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import ArpackError, eigs, spsolve
+
+
+def stationary_distribution(trans, method='auto', tol=1e-12, max_iter=100000, initial=None, direct_limit=5000):
+    """
+    Solve pi P = pi with sum(pi) = 1.
+
+    Parameters:
+    - trans: transition matrix, numpy array or scipy.sparse matrix
+    - method: 'direct' (linear solve), 'power' (power iteration), 'krylov' (ARPACK, eigs, dense
+              eigenvector for chains of 1 or 2 states)
+              or 'auto' (direct up to direct_limit states, krylov above, falling back to power
+              iteration when ARPACK does not converge or does not return a distribution)
+    - tol: convergence tolerance on the L1 change per iteration (power / krylov)
+    - max_iter: maximum number of iterations (power / krylov)
+    - initial: starting guess, e.g. the distribution of a slightly different chain
+    """
+    n = trans.shape[0]
+    if method == 'auto':
+        if n <= direct_limit:
+            method = 'direct'
+        else:
+            try:
+                return stationary_distribution(trans, 'krylov', tol, max_iter, initial)
+            except (ArpackError, RuntimeError):
+                method = 'power'
+
+    if method == 'direct':
+        # fix pi[-1] = 1 and drop its balance equation, which keeps the system sparse, then normalise
+        A = sp.csr_matrix(trans).T - sp.identity(n, format='csr')
+        A = A.tocsc()
+        rhs = -A[:-1, -1].toarray().ravel()
+        if sp.issparse(trans):
+            head = spsolve(A[:-1, :-1], rhs)
+        else:
+            head = np.linalg.solve(A[:-1, :-1].toarray(), rhs)
+        pi = np.append(head, 1)
+    elif method == 'power':
+        # lazy chain (P + I) / 2 has the same stationary distribution but is never periodic
+        PT = sp.csr_matrix(trans).T.tocsr()
+        pi = np.full(n, 1 / n) if initial is None else np.asarray(initial, dtype=float) / np.sum(initial)
+        for _ in range(max_iter):
+            new_pi = 0.5 * (pi + PT @ pi)
+            new_pi /= new_pi.sum()
+            if np.abs(new_pi - pi).sum() < tol:
+                pi = new_pi
+                break
+            pi = new_pi
+        else:
+            raise RuntimeError(f"power iteration did not converge in {max_iter} iterations")
+    elif method == 'krylov' and n <= 2:
+        # ARPACK needs k < n - 1, so tiny chains take the dense eigenvector
+        dense = trans.toarray() if sp.issparse(trans) else np.asarray(trans, dtype=float)
+        values, vectors = np.linalg.eig(dense.T)
+        pi = np.real(vectors[:, np.argmax(np.abs(values))])
+    elif method == 'krylov':
+        v0 = None if initial is None else np.asarray(initial, dtype=float)
+        values, vectors = eigs(sp.csr_matrix(trans).T, k=1, which='LM', v0=v0, tol=tol, maxiter=max_iter)
+        pi = np.real(vectors[:, 0])
+        # a periodic chain has other eigenvalues of modulus 1, whose vectors are not distributions
+        eps = 1e-8 * np.abs(pi).max()
+        if abs(values[0] - 1) > 1e-8 or (pi.min() < -eps and pi.max() > eps):
+            raise RuntimeError(f"ARPACK returned eigenvalue {values[0]:.6g}, not the stationary distribution")
+    else:
+        raise ValueError(f"unknown method: {method}")
+
+    pi = np.abs(pi)  # clear sign flips and -0.0 from the eigen-solver
+    return pi / pi.sum()
+
+
+def spectral_gap(trans, dense_limit=500):
+    """
+    Spectral gap 1 - |lambda_2| of the transition matrix and the relaxation time 1 / gap,
+    roughly the number of steps the chain needs to forget where it started. A small gap
+    means block averaging needs long blocks (or the exact solve is the better option).
+    """
+    n = trans.shape[0]
+    if n <= max(dense_limit, 3):  # ARPACK needs k=2 < n - 1
+        dense = trans.toarray() if sp.issparse(trans) else np.asarray(trans, dtype=float)
+        moduli = np.sort(np.abs(np.linalg.eigvals(dense)))[::-1]
+    else:
+        moduli = np.sort(np.abs(eigs(sp.csr_matrix(trans).T, k=2, which='LM', return_eigenvectors=False)))[::-1]
+    gap = 1 - moduli[1]
+    relaxation_time = np.inf if gap <= 0 else 1 / gap
+    return gap, relaxation_time
@@ -12,10 +12,13 @@ You need a Google Cloud API key. To do this, go to:
 # Create credentials (API key)
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime
+from pathlib import Path
 import os
-import csv
-import requests
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.travel_collector import TravelTimeCollector, write_rows
 
 # ============== Change the information in this block ==============
 
@@ -33,6 +36,10 @@ end_time = datetime(2024, 11, 26, 0, 0)
 # Set how often to collect data (in minutes)
 interval = 10 
 
+# How many requests to send per second at most, and how many at once
+requests_per_second = 10
+max_workers = 8
+
 # SET the location where the file is saved. Change this to your preferred save location
 # e.g., for Windows: save_directory = "C:/Users/YourName/Desktop"
 save_directory = "."  
@@ -42,7 +49,8 @@ save_directory = "."
 # ================== no need to alter anything below this. ===========================================
 # ================== Feel free to use an AI tool like Cursor to understand this  ==================
 
-def traffic_data(api_key, origin, destination, start_time, end_time, interval, save_directory="."):
+def traffic_data(api_key, origin, destination, start_time, end_time, interval, save_directory=".",
+                 requests_per_second=10, max_workers=8):
     """
     Collects traffic data using Google Maps API and saves it to a CSV file.
     
@@ -54,49 +62,23 @@ def traffic_data(api_key, origin, destination, start_time, end_time, interval, s
         end_time (datetime): When to stop collecting data
         interval (int): Minutes between each data collection
         save_directory (str): Where to save the output file (defaults to current directory)
+        requests_per_second (float): Request rate limit (the requests are sent concurrently)
+        max_workers (int): Number of requests in flight at once
     """
-    current_time = start_time
-    data_rows = []
-
     print(f"Starting data collection from {origin} to {destination}")
     print(f"Time range: {start_time} to {end_time}")
     
-    while current_time <= end_time:
-        timestamp = int(current_time.timestamp())
-        url = (
-            "https://maps.googleapis.com/maps/api/directions/json"
-            f"?origin={origin}&destination={destination}&departure_time={timestamp}&key={api_key}"
-        )
-        
-        response = requests.get(url)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            if data['status'] == 'OK':
-                leg = data['routes'][0]['legs'][0]
-                duration_in_traffic = leg.get('duration_in_traffic', {}).get('text', 'NOT FOUND')
-                print(f"Travel time at {current_time}: {duration_in_traffic}")
-                data_rows.append([current_time.strftime("%Y-%m-%d %H:%M:%S"), duration_in_traffic])
-            else:
-                print(f"Error in response: {data['status']}. Details: {data.get('error_message', 'No additional details')}")
-        else:
-            print(f"Request failed with status code: {response.status_code}")
-        
-        current_time += timedelta(minutes=interval)
+    # every departure time is fetched concurrently over one pooled connection,
+    # with retries and backoff (see common/travel_collector.py)
+    with TravelTimeCollector(api_key, requests_per_second, max_workers) as collector:
+        data_rows = collector.collect([(origin, destination, start_time, end_time, interval)])[0]['rows']
     
     filename = f"{origin[:3]}-{destination[:3]}_{start_time.strftime('%dth%b_%H-%M')}.csv"
     filepath = os.path.join(save_directory, filename)
     
     try:
-        # create directory if it doesn't exist
-        os.makedirs(save_directory, exist_ok=True)
-        
-        # save collected data to CSV file
-        with open(filepath, 'w', newline='') as csvfile:
-            csvwriter = csv.writer(csvfile)
-            csvwriter.writerow(['Date and Time', 'Travel Time'])
-            csvwriter.writerows(data_rows)
+        # save collected data to CSV file (creates the directory if it doesn't exist)
+        write_rows(filepath, data_rows)
         
         print(f"\nData collection completed!")
         print(f"Data saved to: {os.path.abspath(filepath)}")
@@ -109,4 +91,5 @@ def traffic_data(api_key, origin, destination, start_time, end_time, interval, s
         print("Please check your save location and try again")
 
 if __name__ == "__main__":
-    traffic_data(api_key, origin, destination, start_time, end_time, interval, save_directory)
\ No newline at end of file
+    traffic_data(api_key, origin, destination, start_time, end_time, interval, save_directory,
+                 requests_per_second, max_workers)
\ No newline at end of file
@@ -6,28 +6,36 @@ data i have from the FCT Project on the Enniskillen -> Belfast route.
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import datetime
+import sys
 from pathlib import Path
-import glob
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.travel_store import load_store
 
-# function to load all data. 
-def load_all_data(folder_path):
-    all_data = []
-    for file in glob.glob(f"{folder_path}/Enn-Bel_*.csv"):
-        df = pd.read_csv(file)
-        df['Date and Time'] = pd.to_datetime(df['Date and Time'])
-        df['Time'] = df['Date and Time'].dt.time
-        all_data.append(df)
-    return all_data
+
+# function to load all data: a (days, slots) matrix of travel minutes from the
+# memory-mapped store (common/travel_store.py), built from the CSVs on first use
+def load_all_data(folder_path, route='Enn-Bel'):
+    store = load_store(folder_path)
+    return np.asarray(store.minutes[store.route(route)], dtype=float)
 
 
 # creating a typical dat mnodel with CI + saving to csv. 
 def create_typical_day_model(all_data, output_path='./typical_day_stats.csv'):
-    # Combine all dataframes + group by time to calc stats
-    combined_df = pd.concat(all_data)
-    typical_day = combined_df.groupby('Time').agg({
-        'Travel Minutes': ['mean', 'std', 'min', 'max']
-    }).reset_index()
+    # stats per 10 min slot across days. the closing midnight reading of each day
+    # counts as one more 00:00 sample (same as grouping the csv rows by clock time)
+    n_days, n_slots = all_data.shape[0], all_data.shape[1] - 1
+    by_time = np.full((2 * n_days, n_slots), np.nan)
+    by_time[:n_days] = all_data[:, :n_slots]
+    by_time[n_days:, 0] = all_data[:, n_slots]
+    typical_day = pd.DataFrame({
+        ('Time', ''): [datetime.time(m // 60, m % 60) for m in range(0, 24 * 60, 24 * 60 // n_slots)],
+        ('Travel Minutes', 'mean'): np.nanmean(by_time, axis=0),
+        ('Travel Minutes', 'std'): np.nanstd(by_time, axis=0, ddof=1),
+        ('Travel Minutes', 'min'): np.nanmin(by_time, axis=0),
+        ('Travel Minutes', 'max'): np.nanmax(by_time, axis=0),
+    })
     
     # calc culate 95% confidence intervals
     n_samples = len(all_data)  # number of days
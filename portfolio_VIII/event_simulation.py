@@ -26,9 +26,19 @@ class SimplePollingQueue:
         # Statistics
         self.total_voters = 0
     
-    def run_simulation(self, duration_hours=12):
-        """Run the simulation for specified hours"""
+    def run_simulation(self, duration_hours=12, method='minute'):
+        """
+        Run the simulation for specified hours
+
+        method='minute' steps one minute at a time (at most one arrival and one service per minute),
+        method='event' jumps straight between arrivals and departures (see run_events)
+        """
         duration = duration_hours * 60  # Convert to minutes
+        if method == 'event':
+            self.run_events(duration)
+            return
+        if method != 'minute':
+            raise ValueError(f"unknown method: {method}")
         
         while self.time < duration:
             # Record current state
@@ -46,6 +56,77 @@ class SimplePollingQueue:
             
             self.time += 1
     
+    def run_events(self, duration):
+        """
+        Exact continuous-time (Gillespie) simulation up to duration minutes.
+        Arrivals happen at rate arrival_rate/60 per minute and services at service_rate/60 while the
+        queue is non-empty, so the time to the next event is exponential with the total rate.
+        Cost scales with the number of events, not the number of minutes.
+        The history records the queue length after every change (a step function in time).
+        """
+        arrival_rate = self.arrival_rate / 60
+        service_rate = self.service_rate / 60
+
+        self.queue_history.append(self.queue_length)
+        self.time_history.append(self.time)
+        while True:
+            total_rate = arrival_rate + (service_rate if self.queue_length > 0 else 0)
+            if total_rate == 0:
+                break
+            next_time = self.time + np.random.exponential(1 / total_rate)
+            if next_time >= duration:
+                break
+            self.time = next_time
+
+            if np.random.random() < arrival_rate / total_rate:
+                if self.capacity is not None and self.queue_length >= self.capacity:
+                    continue  # turned away, nothing changes
+                self.queue_length += 1
+                self.total_voters += 1
+            else:
+                self.queue_length -= 1
+
+            self.queue_history.append(self.queue_length)
+            self.time_history.append(self.time)
+        self.time = duration
+    
+    def run_replicas(self, n_replicas=1000, duration_hours=12, quantiles=(0.05, 0.5, 0.95), rng=None):
+        """
+        Run n_replicas independent copies of run_simulation at once with numpy arrays.
+        The arrival/service coin flips are drawn as (n_replicas, minutes) matrices and the
+        queue of every replica is stepped together one minute (column) at a time.
+        Does not touch the single-run state used by plot_results.
+
+        Returns a dict of summary statistics:
+        - mean_queue, max_queue, total_voters: arrays with one value per replica
+        - time: the minutes recorded
+        - queue_quantiles: (len(quantiles), minutes) queue length quantiles across replicas
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        duration = duration_hours * 60  # Convert to minutes
+        arrivals = rng.random((n_replicas, duration)) < self.arrival_rate/60
+        services = rng.random((n_replicas, duration)) < self.service_rate/60
+        capacity = np.inf if self.capacity is None else self.capacity
+
+        queue_length = np.zeros(n_replicas, dtype=np.int64)
+        total_voters = np.zeros(n_replicas, dtype=np.int64)
+        queue_history = np.empty((duration, n_replicas), dtype=np.int32)
+        for minute in range(duration):
+            queue_history[minute] = queue_length
+            admitted = arrivals[:, minute] & (queue_length < capacity)
+            queue_length += admitted
+            total_voters += admitted
+            queue_length -= services[:, minute] & (queue_length > 0)
+
+        return {
+            'mean_queue': queue_history.mean(axis=0),
+            'max_queue': queue_history.max(axis=0),
+            'total_voters': total_voters,
+            'time': np.arange(duration),
+            'queue_quantiles': np.quantile(queue_history, quantiles, axis=1),
+        }
+
     def plot_results(self):
         """Visualize the queue length over time"""
         plt.figure(figsize=(10, 6))
@@ -61,7 +142,9 @@ class SimplePollingQueue:
         
         print("\nSimulation Results:")
         print(f"Total Voters: {self.total_voters}")
-        print(f"Average Queue Length: {np.mean(self.queue_history):.1f}")
+        # weight each recorded length by how long it lasted (all 1 minute in the minute-by-minute mode)
+        durations = np.diff(np.append(self.time_history, self.time))
+        print(f"Average Queue Length: {np.average(self.queue_history, weights=durations):.1f}")
         print(f"Maximum Queue Length: {max(self.queue_history)}")
 
 # Run simulation
@@ -69,4 +152,11 @@ if __name__ == "__main__":
     # Example: 20 arrivals per hour, 15 services per hour
     sim = SimplePollingQueue(arrival_rate=20, service_rate=30, capacity=10)
     sim.run_simulation(duration_hours=8)  # Run for 8 hours
-    sim.plot_results()
\ No newline at end of file
+    sim.plot_results()
+
+    # Distribution over many replications
+    replicas = sim.run_replicas(n_replicas=10000, duration_hours=8)
+    print(f"\nOver {len(replicas['mean_queue'])} replications:")
+    print(f"Average Queue Length: {replicas['mean_queue'].mean():.2f} ± {1.96 * replicas['mean_queue'].std(ddof=1) / np.sqrt(len(replicas['mean_queue'])):.2f}")
+    print(f"Average Maximum Queue Length: {replicas['max_queue'].mean():.1f}")
+    print(f"Average Total Voters: {replicas['total_voters'].mean():.1f}")
\ No newline at end of file
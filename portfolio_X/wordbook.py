@@ -1,6 +1,11 @@
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.stats import gamma
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.quantile_sketch import KLLSketch
 
 # Parameters
 average_time_min = 2
@@ -10,63 +15,138 @@ std_seconds_per_word = 1
 daily_participation_rate = 0.85
 num_users = 100000
 num_simulations = 1000
+num_bins = 50
 
 # Calculate gamma parameters BEFORE the simulation loop
 theta = (std_dev_min ** 2) / average_time_min
 k = (average_time_min / theta)
 
-# Store histogram data for each simulation
-hist_data = []
-for _ in range(num_simulations):
-    uses_app = np.random.random(num_users) < daily_participation_rate
-    time_spent_minutes = np.zeros(num_users)
-    time_spent_minutes[uses_app] = gamma.rvs(a=k, scale=theta, size=np.sum(uses_app))
-    time_spent_minutes = np.clip(time_spent_minutes, 0, 60)
-    
-    seconds_per_word = np.random.normal(mean_seconds_per_word, std_seconds_per_word, num_users)
-    seconds_per_word = np.maximum(seconds_per_word, 1)
-    
-    words_per_user = (time_spent_minutes * 60) / seconds_per_word
-    hist_counts, _ = np.histogram(words_per_user, bins=50)
-    hist_data.append(hist_counts)
-
-# Calculate mean and standard deviation for each bin
-hist_mean = np.mean(hist_data, axis=0)
-hist_std = np.std(hist_data, axis=0)
-
-# Generate one final set of data for the main histogram
-uses_app = np.random.random(num_users) < daily_participation_rate
-time_spent_minutes = np.zeros(num_users)
-time_spent_minutes[uses_app] = gamma.rvs(a=k, scale=theta, size=np.sum(uses_app))
-time_spent_minutes = np.clip(time_spent_minutes, 0, 60)
-
-seconds_per_word = np.random.normal(mean_seconds_per_word, std_seconds_per_word, num_users)
-seconds_per_word = np.maximum(seconds_per_word, 1)
-
-words_per_user = (time_spent_minutes * 60) / seconds_per_word
-
-# Calculate percentiles
-percentile_25 = np.percentile(words_per_user, 20)
-percentile_75 = np.percentile(words_per_user, 80)
-
-# Final plot with error bars
-plt.figure(figsize=(10, 6))
-counts, bins, _ = plt.hist(words_per_user, bins=50, color='lightgreen', edgecolor='black', alpha=0.7)
-bin_centers = (bins[:-1] + bins[1:]) / 2
-
-# Add error bars
-plt.errorbar(bin_centers, counts, yerr=hist_std, fmt='none', color='blue', alpha=0.5)
-
-plt.axvspan(percentile_25, percentile_75, color='blue', alpha=0.2, label='IQR (20-80th percentile)')
-plt.axvline(x=percentile_25, color='b', linestyle='--')
-plt.axvline(x=percentile_75, color='b', linestyle='--')
-plt.title('Distribution of Words Covered per User')
-plt.xlabel('Words Covered')
-plt.ylabel('Number of Users')
-plt.grid(True)
-plt.legend()
-plt.savefig('portfolio_X/figure1.png', dpi=300, bbox_inches='tight')
-plt.show()
-
-print(f"20th percentile: {percentile_25:.1f} words")
-print(f"80th percentile: {percentile_75:.1f} words")
+
+def simulate_words(shape, rng):
+    """
+    Words covered by each user, for an array of users of the given shape, e.g. (simulations, users).
+    Drawn in float32 with the Generator directly (no scipy.stats.gamma.rvs or float64 temporaries).
+    """
+    uses_app = rng.random(shape, dtype=np.float32) < daily_participation_rate
+    time_spent_minutes = np.zeros(shape, dtype=np.float32)
+    time_spent_minutes[uses_app] = theta * rng.standard_gamma(k, size=np.count_nonzero(uses_app), dtype=np.float32)
+    np.clip(time_spent_minutes, 0, 60, out=time_spent_minutes)
+
+    seconds_per_word = rng.standard_normal(shape, dtype=np.float32)
+    seconds_per_word *= std_seconds_per_word
+    seconds_per_word += mean_seconds_per_word
+    np.maximum(seconds_per_word, 1, out=seconds_per_word)
+
+    time_spent_minutes *= 60
+    time_spent_minutes /= seconds_per_word
+    return time_spent_minutes
+
+
+def fixed_edges(bins=num_bins, pilot_users=num_users, seed=None):
+    """
+    Histogram edges chosen once, from 0 to a bit above the largest value in a pilot run, so every
+    simulation counts into the same bins (np.histogram(..., bins=50) picks new edges every time)
+    """
+    pilot = simulate_words(pilot_users, np.random.default_rng(seed))
+    return np.linspace(0, 1.1 * float(pilot.max()), bins + 1)
+
+
+def _histogram_chunk(job):
+    """
+    Histograms of n_sims simulations with one Generator, a block of simulations at a time so
+    memory stays at about max_block_users values. Returns the sums of the bin counts and of the
+    squared bin counts over the chunk (int64), the number of values past the last edge and a
+    quantile sketch of every value in the chunk.
+    """
+    n_sims, n_users, edges, seed, max_block_users, sketch_k = job
+    rng = np.random.default_rng(seed)
+    sketch = KLLSketch(sketch_k, rng=rng)
+    bins = len(edges) - 1
+    scale = np.float32(bins / edges[-1])
+    counts_sum = np.zeros(bins, dtype=np.int64)
+    counts_sq_sum = np.zeros(bins, dtype=np.int64)
+    overflow = 0
+    block = max(1, max_block_users // n_users)
+    for start in range(0, n_sims, block):
+        rows = min(block, n_sims - start)
+        words = simulate_words((rows, n_users), rng)
+        index = (words * scale).astype(np.int64)  # uniform bins, so the bin is just a scaled floor
+        index[words == edges[-1]] = bins - 1      # right edge belongs to the last bin, as in np.histogram
+        inside = index < bins
+        overflow += int(rows * n_users - np.count_nonzero(inside))
+        # shift each simulation into its own block of bins so one bincount does them all
+        index += bins * np.arange(rows)[:, None]
+        counts = np.bincount(index[inside], minlength=rows * bins).reshape(rows, bins)
+        counts_sum += counts.sum(axis=0)
+        counts_sq_sum += (counts ** 2).sum(axis=0)
+        sketch.update(words)
+    return counts_sum, counts_sq_sum, overflow, sketch
+
+
+def simulate_histograms(edges, n_simulations=num_simulations, n_users=num_users, chunk_size=25,
+                        seed=None, workers=None, max_block_users=1 << 21, sketch_k=1000):
+    """
+    Mean and standard deviation of each bin's count over n_simulations, with the simulations
+    streamed through a process pool in chunks of chunk_size. Chunk i draws from child i of
+    SeedSequence(seed), so the result for a seed does not depend on the number of workers
+    (workers=1 runs in this process). Only the running sums come back from the workers.
+
+    Also returns a KLL sketch (common/quantile_sketch.py) of all n_simulations x n_users values,
+    merged from the per-chunk sketches, for pooled percentiles at constant memory.
+    """
+    n_chunks = -(-n_simulations // chunk_size)
+    children = np.random.SeedSequence(seed).spawn(n_chunks)
+    jobs = [(min(chunk_size, n_simulations - i * chunk_size), n_users, edges, child, max_block_users, sketch_k)
+            for i, child in enumerate(children)]
+    if workers == 1:
+        results = [_histogram_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_histogram_chunk, jobs))
+
+    counts_sum = sum(result[0] for result in results)
+    counts_sq_sum = sum(result[1] for result in results)
+    overflow = sum(result[2] for result in results)
+    sketch = results[0][3]
+    for result in results[1:]:
+        sketch.merge(result[3])
+    hist_mean = counts_sum / n_simulations
+    hist_std = np.sqrt(np.maximum(counts_sq_sum / n_simulations - hist_mean ** 2, 0))  # ddof=0 like np.std
+    return hist_mean, hist_std, overflow, sketch
+
+
+if __name__ == "__main__":
+    edges = fixed_edges()
+    hist_mean, hist_std, overflow, sketch = simulate_histograms(edges)
+    if overflow:
+        print(f"{overflow} values fell past the last bin edge ({edges[-1]:.1f} words)")
+
+    # Generate one final set of data for the main histogram
+    words_per_user = simulate_words(num_users, np.random.default_rng())
+
+    # Percentiles pooled over every user of every simulation, from the sketch
+    percentile_25, percentile_75 = sketch.percentile([20, 80])
+    (low_25, low_75), (high_25, high_75) = sketch.quantile_interval([0.2, 0.8])
+
+    # Final plot with error bars, on the same edges as the simulated counts
+    plt.figure(figsize=(10, 6))
+    counts, bins, _ = plt.hist(words_per_user, bins=edges, color='lightgreen', edgecolor='black', alpha=0.7)
+    bin_centers = (bins[:-1] + bins[1:]) / 2
+
+    # Add error bars
+    plt.errorbar(bin_centers, counts, yerr=hist_std, fmt='none', color='blue', alpha=0.5)
+
+    plt.axvspan(percentile_25, percentile_75, color='blue', alpha=0.2, label='IQR (20-80th percentile)')
+    plt.axvline(x=percentile_25, color='b', linestyle='--')
+    plt.axvline(x=percentile_75, color='b', linestyle='--')
+    plt.title('Distribution of Words Covered per User')
+    plt.xlabel('Words Covered')
+    plt.ylabel('Number of Users')
+    plt.grid(True)
+    plt.legend()
+    plt.savefig('portfolio_X/figure1.png', dpi=300, bbox_inches='tight')
+    plt.show()
+
+    print(f"20th percentile: {percentile_25:.1f} words (between {low_25:.1f} and {high_25:.1f})")
+    print(f"80th percentile: {percentile_75:.1f} words (between {low_75:.1f} and {high_75:.1f})")
+    print(f"pooled over {sketch.n} users, {len(sketch)} values kept in the sketch")
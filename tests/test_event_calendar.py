@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.event_calendar import EventCalendar
+
+
+def test_len_ignores_unknown_and_repeated_cancels():
+    calendar = EventCalendar()
+    first = calendar.schedule(1.0, 'arrival')
+    second = calendar.schedule(2.0, 'departure')
+    calendar.cancel(99)
+    calendar.cancel(first)
+    calendar.cancel(first)
+    assert len(calendar) == 1
+    assert calendar.pop() == (2.0, 'departure', None)
+    calendar.cancel(second)  # already popped
+    assert len(calendar) == 0
+    assert calendar.peek_time() == float('inf')
@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'FCT_project'))
+from nonstationary_mm1 import NonStationaryMM1
+from nonstationary_mmc import NonStationaryMMc
+
+
+def arrival_rate(t):
+    return 4 + 3 * np.sin(2 * np.pi * t / 24)
+
+
+def service_rate(t):
+    return 6.0
+
+
+@pytest.mark.parametrize('make', [
+    lambda **kw: NonStationaryMM1(arrival_rate, service_rate, T_end=24, rng=5, **kw),
+    lambda **kw: NonStationaryMMc(arrival_rate, service_rate, T_end=24, servers=2, rng=5, **kw),
+])
+def test_average_queue_length_does_not_depend_on_record_history(make):
+    with_history, without_history = make(record_history=True), make(record_history=False)
+    with_history.run_simulation()
+    without_history.run_simulation()
+    assert with_history.get_statistics() == pytest.approx(without_history.get_statistics())
+
+
+def test_average_queue_length_without_grid_is_time_weighted():
+    sim = NonStationaryMM1(arrival_rate, service_rate, T_end=np.inf, max_departures=500, rng=5)
+    sim.run_simulation()
+    times, lengths = sim.time_history, sim.queue_length_history
+    expected = np.sum(lengths * np.diff(np.append(times, sim.current_time))) / sim.current_time
+    assert sim.get_statistics()['average_queue_length'] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('fifo', ['deque', 'dict'])
+def test_arrival_times_not_kept_without_waiting_times(fifo):
+    sim = NonStationaryMM1(arrival_rate, service_rate, T_end=24, collect_waiting_times=False, fifo=fifo, rng=5)
+    sim.run_simulation()
+    assert sim.total_arrivals > 0
+    assert len(sim.arrival_times) == 0
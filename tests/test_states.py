@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'FCT_project'))
+from states import assign_states, categorize_states
+
+
+def test_thresholds_are_medium():
+    codes = assign_states([10, 20, 25, 30, 40], 20, 30)
+    assert codes.tolist() == [0, 1, 1, 1, 2]
+
+
+def test_nan_minutes_get_no_state():
+    codes = assign_states([10, np.nan, 40], 20, 30)
+    assert codes.tolist() == [0, -1, 2]
+
+
+def test_unreadable_duration_is_left_unlabelled():
+    df = pd.DataFrame({'Date and Time': [f"2024-11-01 00:{m}0:00" for m in range(5)],
+                       'Travel Time': ['50 mins', 'NOT FOUND', '1 hour 5 mins', '55 mins', '58 mins']})
+    labelled, _ = categorize_states(df)
+    assert labelled['State'].tolist()[1] == ''
+    assert pd.isna(labelled['Travel Minutes'][1])
+    assert labelled['State'].tolist()[2] == 'High'
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from scipy.sparse.linalg import ArpackNoConvergence
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'portfolio_VI'))
+import stationary
+from stationary import spectral_gap, stationary_distribution
+
+
+def ring_chain(n, seed=0):
+    """Sparse irreducible chain: mostly nearest-neighbour moves on a ring plus a random jump"""
+    rng = np.random.default_rng(seed)
+    states = np.arange(n)
+    rows = np.concatenate([states] * 4)
+    cols = np.concatenate([(states - 1) % n, (states + 1) % n, states, rng.integers(0, n, n)])
+    vals = np.concatenate([np.full(n, 0.4), np.full(n, 0.35), np.full(n, 0.2), np.full(n, 0.05)])
+    P = sp.csr_matrix((vals, (rows, cols)), shape=(n, n))
+    return sp.diags(1 / np.asarray(P.sum(axis=1)).ravel()) @ P
+
+
+@pytest.mark.parametrize('P', [np.array([[1.0]]), np.array([[0.3, 0.7], [0.6, 0.4]])])
+def test_krylov_small_chains(P):
+    assert stationary_distribution(P, 'krylov') == pytest.approx(stationary_distribution(P, 'direct'))
+
+
+def test_spectral_gap_small_chain_with_no_dense_limit():
+    P = np.array([[0.3, 0.7], [0.6, 0.4]])
+    assert spectral_gap(P, dense_limit=0)[0] == pytest.approx(0.7)
+
+
+def test_auto_uses_krylov_above_direct_limit(monkeypatch):
+    P = ring_chain(300)
+    calls = []
+    eigs = stationary.eigs
+    monkeypatch.setattr(stationary, 'eigs', lambda *args, **kwargs: calls.append(1) or eigs(*args, **kwargs))
+    pi = stationary_distribution(P, direct_limit=100)
+    assert calls
+    assert pi == pytest.approx(stationary_distribution(P, 'direct'))
+
+
+def test_auto_falls_back_to_power_iteration(monkeypatch):
+    P = ring_chain(300)
+
+    def failing_eigs(*args, **kwargs):
+        raise ArpackNoConvergence("no convergence", np.empty(0), np.empty((0, 0)))
+
+    monkeypatch.setattr(stationary, 'eigs', failing_eigs)
+    pi = stationary_distribution(P, direct_limit=100)
+    assert pi == pytest.approx(stationary_distribution(P, 'direct'))
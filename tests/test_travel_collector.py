@@ -0,0 +1,110 @@
+"""
+common/travel_collector.py against a local stub of the Directions API.
+
+The stub answers by departure time (in minutes past midnight), so each slot of a job hits one
+scenario: a normal answer, a 429 on the first try, a non-retryable API error or an HTML body.
+"""
+
+import json
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common.travel_collector import RequestFailed, TravelTimeCollector
+
+DAY = datetime(2024, 11, 1)
+OK, RATE_LIMITED, DENIED, HTML = 0, 10, 20, 30  # minutes past midnight of each scenario
+
+
+def _directions(text):
+    return {'status': 'OK', 'routes': [{'legs': [{'duration_in_traffic': {'text': text}}]}]}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    hits = Counter()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, body, content_type='application/json', headers=()):
+        data = body.encode()
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        departure = int(parse_qs(urlparse(self.path).query)['departure_time'][0])
+        minute = (departure - int(DAY.timestamp())) // 60
+        self.hits[minute] += 1
+        if minute == RATE_LIMITED and self.hits[minute] == 1:
+            self._send(429, '{}', headers=[('Retry-After', '0')])
+        elif minute == DENIED:
+            self._send(200, json.dumps({'status': 'REQUEST_DENIED', 'error_message': 'bad key'}))
+        elif minute == HTML:
+            self._send(200, '<html>Service Unavailable</html>', content_type='text/html')
+        else:
+            self._send(200, json.dumps(_directions(f"{50 + minute} mins")))
+
+
+@pytest.fixture
+def stub_url():
+    StubHandler.hits.clear()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/json"
+    server.shutdown()
+    server.server_close()
+
+
+def _collector(url, **kwargs):
+    return TravelTimeCollector('test-key', requests_per_second=None, max_workers=4, backoff=0.01,
+                               base_url=url, verbose=False, rng=0, **kwargs)
+
+
+def test_success(stub_url):
+    with _collector(stub_url) as collector:
+        assert collector.fetch('Enniskillen', 'Belfast', DAY) == '50 mins'
+    assert collector.requests_sent == 1 and collector.retries == 0
+
+
+def test_429_is_retried(stub_url):
+    with _collector(stub_url) as collector:
+        assert collector.fetch('Enniskillen', 'Belfast', DAY.replace(minute=RATE_LIMITED)) == '60 mins'
+    assert StubHandler.hits[RATE_LIMITED] == 2
+    assert collector.retries == 1
+
+
+def test_api_error_is_not_retried(stub_url):
+    with _collector(stub_url) as collector:
+        with pytest.raises(RequestFailed, match='REQUEST_DENIED'):
+            collector.fetch('Enniskillen', 'Belfast', DAY.replace(minute=DENIED))
+    assert StubHandler.hits[DENIED] == 1
+
+
+def test_malformed_body_fails_the_slot(stub_url):
+    with _collector(stub_url) as collector:
+        with pytest.raises(RequestFailed, match='Malformed response'):
+            collector.fetch('Enniskillen', 'Belfast', DAY.replace(minute=HTML))
+
+
+def test_collect_keeps_going_past_failed_slots(stub_url):
+    # 00:00 to 00:40 every 10 minutes: the HTML and denied slots fail, the rest come back in order
+    with _collector(stub_url) as collector:
+        (result,) = collector.collect([('Enniskillen', 'Belfast', DAY, DAY.replace(minute=40), 10)])
+    assert result['rows'] == [['2024-11-01 00:00:00', '50 mins'],
+                              ['2024-11-01 00:10:00', '60 mins'],
+                              ['2024-11-01 00:40:00', '90 mins']]
+    assert [departure.minute for departure, _ in result['errors']] == [DENIED, HTML]